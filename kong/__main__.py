@@ -0,0 +1,93 @@
+'''Runs one or more reads of a Module block's directives against a status URL or saved payload outside of collectd,
+printing the emitted series, series counts per metric, and each read's stage timings and memory.
+
+python -m kong --url http://kong:8001/signalfx -d 'ReportHTTPMethods false' --reads 2
+python -m kong --config kong_module.conf --payload status.json --memory --series
+'''
+from __future__ import absolute_import, print_function
+from collections import defaultdict
+import os
+import sys
+
+from kong.capture import load_payload_file
+from kong.replay import replay, tracemalloc
+
+
+def config_string(config_path=None, directives=None, url=None):
+    lines = []
+    if config_path:
+        with open(config_path) as f:
+            lines.append(f.read())
+    lines.extend(directives or [])
+    if url:
+        lines.append('URL "{0}"'.format(url))
+    return '\n'.join(lines)
+
+
+def format_read(result):
+    lines = ['Read {0}: {1} contexts, {2} groups, {3} datapoints, parsed with {4}'.format(
+        result['read'], result['contexts'], result['groups'], result['datapoints'], result['json_backend'])]
+    stages = result['stages']
+    for stage in sorted(stages, key=stages.get, reverse=True):
+        lines.append('  {0:<20} {1:>10.2f} ms'.format(stage, stages[stage] * 1000))
+    if 'peak_bytes' in result:
+        lines.append('  {0:<20} {1:>10.1f} KiB'.format('memory peak', result['peak_bytes'] / 1024.))
+        lines.append('  {0:<20} {1:>10.1f} KiB'.format('memory retained', result['retained_bytes'] / 1024.))
+    return '\n'.join(lines)
+
+
+def format_series_counts(series):
+    counts = defaultdict(int)
+    for metric_type, type_instance, _ in series:
+        counts['{0}.{1}'.format(metric_type, type_instance)] += 1
+    lines = ['Series per metric:']
+    for metric in sorted(counts):
+        lines.append('  {0:<50} {1:>8}'.format(metric, counts[metric]))
+    lines.append('  {0:<50} {1:>8}'.format('total', len(series)))
+    return '\n'.join(lines)
+
+
+def format_series(series):
+    lines = ['Series:']
+    for metric_type, type_instance, dimensions in series:
+        lines.append('  {0}.{1} {2}'.format(metric_type, type_instance,
+                                            ' '.join(['{0}={1}'.format(k, v) for k, v in dimensions])))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    import argparse
+    from collectdutil.utils import ParsedConfig
+    from kong.config import Config
+
+    parser = argparse.ArgumentParser(prog='python -m kong', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--url', help='Status URL to request for each read (overrides URL)')
+    source.add_argument('--payload', help='Saved status response (.json, or a gzipped capture) used for each read')
+    parser.add_argument('--config', help='File of collectd Module block directives')
+    parser.add_argument('-d', '--directive', action='append', dest='directives', default=[],
+                        help="Additional directive, e.g. -d 'ReportStatusCodes true'.  May be repeated")
+    parser.add_argument('--reads', type=int, default=1, help='Number of reads to run (default 1)')
+    parser.add_argument('--memory', action='store_true', help='Also trace memory (slows timings)')
+    parser.add_argument('--series', action='store_true', help='Print every series of the last read')
+    args = parser.parse_args(argv)
+    if args.reads < 1:
+        parser.error('--reads must be at least 1.')
+    if args.memory and tracemalloc is None:
+        parser.error('--memory requires Python 3.4 or later.')
+    if args.payload and not os.path.exists(args.payload):
+        parser.error('No such payload file: {0}'.format(args.payload))
+
+    config = Config(ParsedConfig(config_string(args.config, args.directives, args.url)))
+    payload = load_payload_file(args.payload) if args.payload else None
+    for result in replay(config, [payload] * args.reads, args.memory):
+        print(format_read(result))
+    if args.series:
+        print(format_series(result['series']))
+    print(format_series_counts(result['series']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+from __future__ import absolute_import
+import multiprocessing
+
+from kong.kong_state import fold_resource_metrics
+from kong.utils import merge_group_sums
+
+
+chunks_per_process = 4  # Tasks per worker process each read, evening out uneven group sizes
+
+
+def sum_encoded_metrics(runs):
+    '''Decodes and sums the encoded resource metrics of each (group index, [encoded metrics]) run, returning
+    {group index: ({metric: sum}, {status code: {metric: sum}})} partial sums.  Runs in pool workers.
+    '''
+    partials = {}
+    for group_index, encoded_metrics in runs:
+        if group_index not in partials:
+            partials[group_index] = ({}, {})
+        sums, status_sums = partials[group_index]
+        for encoded in encoded_metrics:
+            fold_resource_metrics(encoded, sums, status_sums)
+    return partials
+
+
+class ShardedAggregator(object):
+    '''Sums the encoded resource metrics of context groups across a persistent pool of worker processes.
+
+    Each read's contexts are partitioned, in group order, into chunks of roughly equal size so large groups
+    are split across workers.  Workers return per-group partial sums, which are merged here.  The pool is
+    forked once, so workers are started before collectd's read threads and reused by every read.
+
+    sa = ShardedAggregator(4)
+    group_sums = sa.aggregate(groups, kong_state.encoded_metrics)
+    metric_sums, status_code_sums = group_sums[0]
+    '''
+
+    def __init__(self, processes):
+        self.processes = int(processes)
+        try:
+            context = multiprocessing.get_context('fork')
+        except (AttributeError, ValueError):  # Python < 3.4 forks on POSIX
+            context = multiprocessing
+        self.pool = context.Pool(self.processes)
+
+    def partition(self, groups, encoded_metrics):
+        '''Returns chunks of (group index, [encoded metrics]) runs covering every group member.'''
+        total = sum([len(group) for group in groups])
+        chunk_size = max(1, -(-total // (self.processes * chunks_per_process)))
+        chunks = []
+        chunk, chunk_len = [], 0
+        for group_index, group in enumerate(groups):
+            run = []
+            for ctx_hash in group:
+                run.append(encoded_metrics[ctx_hash])
+                chunk_len += 1
+                if chunk_len == chunk_size:
+                    chunk.append((group_index, run))
+                    chunks.append(chunk)
+                    chunk, chunk_len, run = [], 0, []
+            if run:
+                chunk.append((group_index, run))
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def aggregate(self, groups, encoded_metrics):
+        '''Returns a ({metric: sum}, {status code: {metric: sum}}) pair for each group.'''
+        group_sums = [({}, {}) for _ in groups]
+        for partials in self.pool.map(sum_encoded_metrics, self.partition(groups, encoded_metrics)):
+            for group_index, (sums, status_sums) in partials.items():
+                merge_group_sums(group_sums[group_index], sums, status_sums)
+        return group_sums
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
@@ -0,0 +1,50 @@
+from __future__ import absolute_import
+import copy
+
+
+# Reporting detail levels in order of degradation.  Each level drops its dimension scope in addition to
+# those of all preceding levels.
+detail_levels = ('full', 'no_status_codes', 'no_http_methods', 'no_route_ids', 'instance')
+recovery_reads = 3  # Consecutive reads within budget before restoring the next finer level
+
+
+class ReadBudget(object):
+    '''Tracks read durations against a time budget to determine the reporting detail level of the next read.
+    Each read over budget degrades one level and each run of recovery_reads reads within budget restores one.
+
+    rb = ReadBudget(5)
+    rb.update(7.5) == 1  # 'no_status_codes'
+    '''
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.level = 0
+        self.reads_within_budget = 0
+
+    def update(self, elapsed):
+        if elapsed > self.budget:
+            self.reads_within_budget = 0
+            self.level = min(self.level + 1, len(detail_levels) - 1)
+        elif self.level:
+            self.reads_within_budget += 1
+            if self.reads_within_budget >= recovery_reads:
+                self.reads_within_budget = 0
+                self.level -= 1
+        return self.level
+
+
+def degraded_config(config, level):
+    '''Returns a shallow Config copy whose behavior flags exclude the dimension scopes dropped at level.'''
+    if not level:
+        return config
+    config = copy.copy(config)
+    config.will_report_status_codes = False
+    if level >= detail_levels.index('no_http_methods'):
+        config.will_report_http_methods = False
+    if level >= detail_levels.index('no_route_ids'):
+        config.will_report_route_ids = False
+    if level >= detail_levels.index('instance'):
+        for flag in ('will_report_api_ids', 'will_report_api_names', 'will_report_apis',
+                     'will_report_service_ids', 'will_report_service_names', 'will_report_services'):
+            setattr(config, flag, False)
+    return config
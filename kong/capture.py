@@ -0,0 +1,79 @@
+from __future__ import absolute_import
+from collections import deque
+import gzip
+import itertools
+import os
+import time
+
+
+capture_prefix = 'kong-status-'
+capture_suffix = '.json.gz'
+compress_level = 1  # Captures are written during reads, so favor speed over size
+sequence = itertools.count()  # Distinguishes captures of the same millisecond across recorders of the process
+
+
+class PayloadRecorder(object):
+    '''Writes raw status endpoint responses as timestamped, gzipped files to a directory, removing the oldest
+    captures beyond max_files.  Files are written under a temporary name and renamed so readers never observe
+    partial captures.  The directory is only listed on creation; later captures are tracked in memory for rotation.
+
+    pr = PayloadRecorder('/var/tmp/kong-captures', max_files=100)
+    pr.record(response.content)
+    '''
+
+    def __init__(self, directory, max_files=100):
+        self.directory = directory
+        self.max_files = int(max_files)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.recorded = deque(captures(directory))  # Paths to rotate, oldest first
+
+    def record(self, content, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        name = '{0}{1}{2:03d}-{3}-{4:06d}{5}'.format(capture_prefix,
+                                                     time.strftime('%Y%m%dT%H%M%S', time.gmtime(timestamp)),
+                                                     int(timestamp * 1000) % 1000, os.getpid(), next(sequence),
+                                                     capture_suffix)
+        path = os.path.join(self.directory, name)
+        f = gzip.open(path + '.tmp', 'wb', compress_level)
+        try:
+            f.write(content)
+        finally:
+            f.close()
+        os.rename(path + '.tmp', path)
+        self.recorded.append(path)
+        self.rotate()
+        return path
+
+    def captures(self):
+        return captures(self.directory)
+
+    def rotate(self):
+        while self.max_files and len(self.recorded) > self.max_files:
+            path = self.recorded.popleft()
+            try:
+                os.remove(path)
+            except OSError:  # Already removed, e.g. by another recorder of the directory
+                pass
+
+
+def captures(directory):
+    '''Returns the paths of all captures in directory in the order they were recorded.'''
+    names = [n for n in os.listdir(directory) if n.startswith(capture_prefix) and n.endswith(capture_suffix)]
+    return [os.path.join(directory, n) for n in sorted(names)]
+
+
+def load_payload(path):
+    f = gzip.open(path, 'rb')
+    try:
+        return f.read()
+    finally:
+        f.close()
+
+
+def load_payload_file(path):
+    '''Returns the payload of a capture, any gzipped file, or a plain status response file.'''
+    if path.endswith(capture_suffix) or path.endswith('.gz'):
+        return load_payload(path)
+    with open(path, 'rb') as f:
+        return f.read()
@@ -1,9 +1,12 @@
 from __future__ import absolute_import
+from hashlib import md5
 
 from collectdutil import config
 from six import text_type
+from six.moves.urllib.parse import urlsplit, urlunsplit
 import collectd
 
+from kong.jsonbackend import backends as json_backends
 from kong.utils import PatternList
 
 
@@ -16,6 +19,10 @@ descriptors = {  # Plugin config descriptor to attribute (w/ default value)
     'CABundle': ('ca_bundle', None),
     'ClientCert': ('client_cert', None),
     'ClientCertKey': ('client_cert_key', None),
+    'Socket': ('socket', None),
+    'JSONBackend': ('json_backend', None),
+    'MaxResponseBytes': ('max_response_bytes', None),
+    'MaxContexts': ('max_contexts', None),
     'ReportHTTPMethods': ('report_http_methods', True),
     'HTTPMethods': ('http_methods_whitelist', None),
     'HTTPMethodsBlacklist': ('http_methods_blacklist', None),
@@ -38,10 +45,37 @@ descriptors = {  # Plugin config descriptor to attribute (w/ default value)
     'ReportRouteIDs': ('report_route_ids', True),
     'RouteIDs': ('route_ids_whitelist', None),
     'RouteIDsBlacklist': ('route_ids_blacklist', None),
+    'DeriveMetrics': ('derive_metrics', False),
+    'EmitRawCounters': ('emit_raw_counters', True),
+    'SampleInterval': ('sample_interval', None),
+    'SampleURL': ('sample_url', None),
+    'ReadTimeBudget': ('read_time_budget', None),
+    'Telemetry': ('telemetry', False),
+    'ProfileDirectory': ('profile_directory', None),
+    'ProfileReads': ('profile_reads', 0),
+    'ProfileSlowerThan': ('profile_slower_than', None),
+    'TraceMalloc': ('trace_malloc', False),
+    'CaptureDirectory': ('capture_directory', None),
+    'CaptureFiles': ('capture_files', 100),
+    'AggregationProcesses': ('aggregation_processes', 0),
+    'ShareFetch': ('share_fetch', False),
+    'StreamingAggregation': ('streaming_aggregation', False),
+    'RollupLevels': ('rollup_levels', None),
+    'MultiValueDispatch': ('multi_value_dispatch', False),
+    'ReadShards': ('read_shards', 1),
+    'IntrospectionSocket': ('introspection_socket', None),
+    'IntrospectionPort': ('introspection_port', None),
+    'SnapshotFile': ('snapshot_file', None),
+    'SnapshotInterval': ('snapshot_interval', 300),
     'Verbose': ('verbose', False),
     'Interval': ('interval', None)  # Defer to collectd
 }
 
+rollup_dimensions = ('api_id', 'api_name', 'service_id', 'service_name', 'route_id', 'http_method', 'status_code')
+rollup_instance = 'instance'  # RollupLevels level without resource dimensions
+socket_scheme = 'unix://'
+socket_host = 'localhost'  # Host header of requests over Socket
+
 metrics = {  # Plugin "Metric" descriptor to collectd type_instance, type, and reporting default
     'response_count': ('kong.responses.count', 'counter', True),
     'response_size': ('kong.responses.size', 'counter', True),
@@ -84,11 +118,77 @@ class Config(config.Config):
             raise TypeError('Cannot simultaneously ReportStatusCodes and ReportStatusCodeGroups.  '
                             'Please specify desired StatusCodes and set ReportStatusCodeGroups to selectively '
                             'report metrics.')
+        if not self.emit_raw_counters and not self.derive_metrics:
+            raise TypeError('Cannot disable EmitRawCounters without DeriveMetrics.  '
+                            'Please enable DeriveMetrics to report counter activity.')
+        if self.streaming_aggregation and (self.aggregation_processes or self.share_fetch):
+            raise TypeError('Cannot combine StreamingAggregation with AggregationProcesses or ShareFetch.  '
+                            'Please select a single aggregation mode.')
+        if self.json_backend is not None and self.json_backend not in json_backends:
+            raise TypeError('Invalid JSONBackend {0}.  Please use one of: {1}.'.format(
+                self.json_backend, ', '.join(json_backends)))
+        if self.introspection_socket and self.introspection_port:
+            raise TypeError('Cannot combine IntrospectionSocket and IntrospectionPort.  '
+                            'Please select a single introspection endpoint.')
+        self.read_shards = int(self.read_shards)  # collectd passes numeric values as floats
+        if self.read_shards < 1:
+            raise TypeError('Invalid ReadShards {0}.  Please use a positive number of read callbacks.'.format(
+                self.read_shards))
+        self.rollups = self.parse_rollup_levels(self.rollup_levels)
+        self.socket_path, self.request_url = self.parse_socket(self.url, self.socket)
+        self.sample_request_url = self.sample_url or self.status_url(self.request_url)
+        if self.read_shards > 1 and (self.rollups or self.streaming_aggregation or self.snapshot_file or
+                                     self.read_time_budget):
+            raise TypeError('Cannot combine ReadShards with RollupLevels, StreamingAggregation, SnapshotFile, or '
+                            'ReadTimeBudget.  Please set ReadShards 1 to use them.')
         self.update_pattern_lists()
         self.set_will_report_flags()
         if self.verbose:
             collectd.info(str(self))
 
+    @staticmethod
+    def parse_rollup_levels(levels):
+        '''Returns a (level, dimensions) pair for each RollupLevels value of '+' separated dimensions.'''
+        levels = levels or []
+        levels = levels if isinstance(levels, list) else [levels]
+        flattened = []
+        for item in levels:  # Repeated directives are lists of values
+            flattened.extend(item if isinstance(item, (list, tuple)) else [item])
+        parsed = []
+        for level in flattened:
+            level = text_type(level)
+            dimensions = () if level == rollup_instance else tuple(level.split('+'))
+            for dimension in dimensions:
+                if dimension not in rollup_dimensions:
+                    raise TypeError('Invalid RollupLevels dimension {0} in {1}.  Please use "{2}" or "+" separated '
+                                    'dimensions of: {3}.'.format(dimension, level, rollup_instance,
+                                                                 ', '.join(rollup_dimensions)))
+            parsed.append((level, dimensions))
+        return parsed
+
+    @staticmethod
+    def parse_socket(url, socket=None):
+        '''Returns the (Unix domain socket path or None, HTTP URL) to request the status of url from.  A
+        unix://<socket path>[:<request path>] url requests its path (default /signalfx) over that socket.
+        '''
+        url = text_type(url)
+        if not url.startswith(socket_scheme):
+            return socket, url
+        if socket:
+            raise TypeError('Cannot combine Socket with a {0} URL.  Please specify the socket path once.'.format(
+                socket_scheme))
+        socket_path, _, path = url[len(socket_scheme):].partition(':')
+        if not socket_path:
+            raise TypeError('Invalid URL {0}.  Please use {1}<socket path>[:<request path>].'.format(
+                url, socket_scheme))
+        return socket_path, u'http://{0}{1}'.format(socket_host, path or '/signalfx')
+
+    @staticmethod
+    def status_url(url):
+        '''Returns the Admin API /status URL beside the endpoint of url, keeping any proxied path prefix.'''
+        parts = urlsplit(url)
+        return urlunsplit((parts.scheme, parts.netloc, parts.path.rsplit('/', 1)[0] + '/status', '', ''))
+
     def update_pattern_lists(self):
         for report in ('report_http_methods', 'report_route_ids', 'report_service_names', 'report_service_ids',
                        'report_api_names', 'report_api_ids', 'report_status_codes'):
@@ -109,6 +209,15 @@ class Config(config.Config):
         self.will_report_apis = self.will_report_api_names or self.will_report_api_ids
         self.will_report_services = self.will_report_service_names or self.will_report_service_ids
 
+    def fingerprint(self):
+        '''Returns a digest of all configured values and behavior flags that is stable across processes.'''
+        attrs = sorted(v[0] for v in self.descriptors.values())
+        attrs.extend(sorted(self.metrics))
+        attrs.extend(sorted(attr for attr in dir(self) if attr.startswith('will_report')))
+        described = [u'{0}: {1}'.format(attr, getattr(self, attr)) for attr in attrs]
+        described.append(u'ExtraDimensions: {0}'.format(sorted(self.extra_dimensions.items())))
+        return md5(u'\n'.join(described).encode('utf-8')).hexdigest()
+
     def __str__(self):
         descriptors = ['{0}: {1}'.format(v[0], getattr(self, v[0])) for v in self.descriptors.values()]
         descriptors.sort()
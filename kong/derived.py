@@ -0,0 +1,93 @@
+from __future__ import absolute_import
+import time
+
+
+mean_latencies = {  # Latency counter to derived mean latency type_instance
+    'request_latency': 'kong.requests.latency.mean',
+    'kong_latency': 'kong.kong.latency.mean',
+    'upstream_latency': 'kong.upstream.latency.mean'
+}
+error_ratio = 'kong.responses.error_ratio'
+
+
+def series_key(metric, dimensions):
+    return metric, frozenset(dimensions.items())
+
+
+def parent_dimensions(dimensions):
+    '''Returns dimension items without any status_code, the scope shared by http method scoped metrics.'''
+    return frozenset((k, v) for k, v in dimensions.items() if k != 'status_code')
+
+
+class DerivedMetrics(object):
+    '''Retains the previous value of every cumulative counter series across reads to derive per-interval gauges:
+
+    '<type_instance>.rate': per second rate of each counter series
+    'kong.*.latency.mean': latency delta / response_count delta for each latency series
+    'kong.responses.error_ratio': 5xx response_count delta / response_count delta (status code scope only)
+
+    A counter value lower than its predecessor is taken as a Kong restart, in which case the current value
+    is the delta since the reset.  Series absent from a read are forgotten.
+    '''
+
+    def __init__(self):
+        self.previous = {}  # series key -> counter value from the last read
+        self.previous_time = None
+
+    def derive(self, counters, metric_types, now=None):
+        '''Takes a list of (metric, [Metric], status code scoped) tuples and the metric -> (type_instance, type)
+        mapping and returns a list of (type_instance, value, dimensions) gauges.
+        Nothing is derived on the first read since there are no prior values.
+        '''
+        now = time.time() if now is None else now
+        elapsed = now - self.previous_time if self.previous_time is not None else None
+        current = {}
+        deltas = []  # (metric, dimensions, delta, status code scoped)
+        for metric, metrics, status_scoped in counters:
+            for m in metrics:
+                key = series_key(metric, m.dimensions)
+                current[key] = m.value
+                if key not in self.previous:
+                    continue
+                delta = m.value - self.previous[key]
+                if delta < 0:  # counter reset
+                    delta = m.value
+                deltas.append((metric, m.dimensions, delta, status_scoped))
+        self.previous = current
+        self.previous_time = now
+        if not elapsed or elapsed <= 0:
+            return []
+
+        counts = {}  # status code scoped response_count deltas by full dimensions
+        parent_counts = {}  # response_count deltas by dimensions less status_code
+        errors = {}
+        for metric, dimensions, delta, status_scoped in deltas:
+            if metric != 'response_count':
+                continue
+            parent = parent_dimensions(dimensions)
+            parent_counts[parent] = parent_counts.get(parent, 0) + delta
+            if status_scoped:
+                counts[frozenset(dimensions.items())] = delta
+                if dimensions.get('status_code', '').startswith('5'):
+                    errors[parent] = errors.get(parent, 0) + delta
+                else:
+                    errors.setdefault(parent, 0)
+
+        derived = []
+        for metric, dimensions, delta, status_scoped in deltas:
+            type_instance = metric_types[metric][0]
+            derived.append(('{0}.rate'.format(type_instance), float(delta) / elapsed, dimensions))
+            if metric not in mean_latencies:
+                continue
+            if status_scoped:
+                count = counts.get(frozenset(dimensions.items()))
+            else:
+                count = parent_counts.get(parent_dimensions(dimensions))
+            if count:
+                derived.append((mean_latencies[metric], float(delta) / count, dimensions))
+
+        for parent, error_count in errors.items():
+            count = parent_counts.get(parent)
+            if count:
+                derived.append((error_ratio, float(error_count) / count, dict(parent)))
+        return derived
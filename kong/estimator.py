@@ -0,0 +1,184 @@
+'''Estimates the groups, series, and per-read CPU cost a Module block's directives would produce for a recorded
+status response without emitting anything, breaking series down by metric and dimension and identifying the
+directive patterns responsible for the largest fan-out.  A second configuration may be compared side by side.
+
+python -m kong.estimator --config kong_module.conf status.json
+python -m kong.estimator --config current.conf --compare proposed.conf /var/tmp/kong-captures/kong-status-1.json.gz
+'''
+from __future__ import absolute_import, print_function
+from collections import defaultdict
+import sys
+
+try:
+    import collectd  # noqa
+except ImportError:  # Not within collectd's embedded interpreter
+    from collectdutil import fauxllectd
+    sys.modules['collectd'] = fauxllectd
+
+from kong.capture import load_payload_file  # noqa
+from kong.config import descriptors  # noqa
+from kong.multivalue import single_metrics  # noqa
+from kong.replay import ReplayReporter  # noqa
+
+
+dimension_whitelists = {'api_id': 'api_ids_whitelist', 'api_name': 'api_names_whitelist',
+                        'service_id': 'service_ids_whitelist', 'service_name': 'service_names_whitelist',
+                        'route_id': 'route_ids_whitelist', 'http_method': 'http_methods_whitelist',
+                        'status_code': 'status_codes_whitelist'}
+top_fan_out = 10  # Patterns listed by default
+
+
+class EstimatingReporter(ReplayReporter):
+    '''ReplayReporter that records series without dispatching them.'''
+
+    def emit_metrics(self, metrics):
+        self.datapoints = len(metrics)
+        self.series = set()
+        for metric in single_metrics(metrics):
+            metric_type, type_instance = metric.metric_series
+            self.series.add((metric_type, type_instance, tuple(sorted(metric.dimensions.items()))))
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.
+
+
+def pattern_source(config, dimension, value):
+    '''Returns the directive and pattern that caused value to be reported for dimension.'''
+    if dimension == 'rollup':
+        return 'RollupLevels', value
+    if dimension == 'status_code' and value.endswith('xx'):
+        return 'ReportStatusCodeGroups', 'true'
+    whitelist_attr = dimension_whitelists.get(dimension)
+    if whitelist_attr is None:
+        return 'ExtraDimension', dimension
+    whitelist = getattr(config, whitelist_attr)
+    report_attr = 'report_{0}'.format(whitelist_attr.replace('_whitelist', ''))
+    for element, pattern in zip(whitelist.elements, whitelist.patterns):
+        if pattern.match(value):
+            if element == '*' and getattr(config, report_attr, False):
+                return directive(report_attr), 'true'
+            return directive(whitelist_attr), element
+    return directive(whitelist_attr), None
+
+
+def directive(attr):
+    for name, (descriptor_attr, _) in descriptors.items():
+        if descriptor_attr == attr:
+            return name
+    return attr
+
+
+def estimate(config, payload, reads=3):
+    '''Runs reads of payload with config, returning the series and cost estimate of the last:
+
+    groups: number of aggregation groups
+    series: number of emitted series
+    metrics: {'<type>.<type_instance>': series}
+    dimensions: {dimension: {'values': distinct values, 'series': series with the dimension}}
+    fan_out: [(series, dimension, directive, pattern, distinct values)] in descending series order
+    cpu_seconds: median read duration excluding the status request
+    stages: median duration of each read stage
+    '''
+    reporter = EstimatingReporter(config, [payload] * reads)
+    durations = []
+    stages = defaultdict(list)
+    for _ in range(reads):
+        reporter.update_and_report()
+        timings = reporter.stage_timings
+        durations.append(timings['total'] - timings.get('get', 0))
+        for stage, duration in timings.items():
+            stages[stage].append(duration)
+
+    metrics = defaultdict(int)
+    dimension_values = defaultdict(set)
+    dimension_series = defaultdict(int)
+    pattern_series = defaultdict(int)
+    pattern_values = defaultdict(set)
+    for metric_type, type_instance, dimensions in reporter.series:
+        metrics['{0}.{1}'.format(metric_type, type_instance)] += 1
+        for dimension, value in dimensions:
+            dimension_values[dimension].add(value)
+            dimension_series[dimension] += 1
+            source = (dimension,) + pattern_source(config, dimension, value)
+            pattern_series[source] += 1
+            pattern_values[source].add(value)
+    fan_out = [(pattern_series[source],) + source + (len(pattern_values[source]),) for source in pattern_series]
+    fan_out.sort(key=lambda f: (-f[0], f[1:4]))
+    return dict(groups=len(reporter.http_method_scoped_groups), series=len(reporter.series), metrics=dict(metrics),
+                dimensions=dict([(d, dict(values=len(v), series=dimension_series[d]))
+                                 for d, v in dimension_values.items()]),
+                fan_out=fan_out, cpu_seconds=median(durations),
+                stages=dict([(stage, median(values)) for stage, values in stages.items()]))
+
+
+def ratio(value, baseline):
+    if not baseline:
+        return ''
+    return 'x{0:.2f}'.format(float(value) / baseline)
+
+
+def format_estimates(estimates, names, top=top_fan_out):
+    '''Formats one or two estimates side by side, with the second's ratio to the first.'''
+    width = 14
+    compare = len(estimates) > 1
+
+    def row(label, values, fmt='{0}'):
+        cells = [fmt.format(v) for v in values]
+        if compare:
+            cells.append(ratio(values[1], values[0]))
+        return '  {0:<48}'.format(label) + ''.join(['{0:>{1}}'.format(c, width) for c in cells])
+
+    lines = ['  {0:<48}'.format('') + ''.join(['{0:>{1}}'.format(n[-width + 1:], width) for n in names])]
+    lines.append(row('groups', [e['groups'] for e in estimates]))
+    lines.append(row('series', [e['series'] for e in estimates]))
+    lines.append(row('cpu per read (ms)', [e['cpu_seconds'] * 1000 for e in estimates], '{0:.2f}'))
+
+    lines.append('Series per metric:')
+    for metric in sorted(set([m for e in estimates for m in e['metrics']])):
+        lines.append(row(metric, [e['metrics'].get(metric, 0) for e in estimates]))
+
+    lines.append('Series per dimension (distinct values):')
+    for dimension in sorted(set([d for e in estimates for d in e['dimensions']])):
+        counts = [e['dimensions'].get(dimension, dict(values=0, series=0)) for e in estimates]
+        lines.append(row('{0} ({1})'.format(dimension, '/'.join([str(c['values']) for c in counts])),
+                         [c['series'] for c in counts]))
+
+    lines.append('Largest fan-out (series, dimension, directive, pattern, distinct values):')
+    for name, estimate in zip(names, estimates):
+        if compare:
+            lines.append('  {0}:'.format(name))
+        for fan_out in estimate['fan_out'][:top]:
+            lines.append('    {0:>8}  {1:<14} {2:<24} {3!s:<24} {4}'.format(*fan_out))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    import argparse
+    from collectdutil.utils import ParsedConfig
+    from kong.config import Config
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('payload', help='Recorded status response (.json, or a gzipped capture)')
+    parser.add_argument('--config', help='File of collectd Module block directives (default Config)')
+    parser.add_argument('--compare', help='File of directives to compare with --config')
+    parser.add_argument('--reads', type=int, default=3, help='Reads to take the median CPU cost of (default 3)')
+    parser.add_argument('--top', type=int, default=top_fan_out, help='Fan-out patterns to list')
+    args = parser.parse_args(argv)
+
+    payload = load_payload_file(args.payload)
+    names, estimates = [], []
+    for path in [args.config] + ([args.compare] if args.compare else []):
+        config_string = ''
+        if path:
+            with open(path) as f:
+                config_string = f.read()
+        names.append(path or 'default')
+        estimates.append(estimate(Config(ParsedConfig(config_string)), payload, max(1, args.reads)))
+    print(format_estimates(estimates, names, args.top))
+
+
+if __name__ == '__main__':
+    main()
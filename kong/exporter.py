@@ -0,0 +1,215 @@
+'''Runs the KongState -> Grouper -> Reporter pipeline as a standalone daemon, refreshing on a schedule and serving the
+most recent read in the Prometheus text exposition format.  Scrapes only write the pre-rendered read, so they never
+request Kong.
+
+python -m kong.exporter --config kong.conf --listen 0.0.0.0:9542 --interval 10
+'''
+from __future__ import absolute_import, print_function
+import re
+import sys
+import threading
+import time
+
+try:
+    import collectd  # noqa
+except ImportError:  # Not within collectd's embedded interpreter
+    from collectdutil import fauxllectd
+    sys.modules['collectd'] = fauxllectd
+    import collectd  # noqa
+
+from six.moves import BaseHTTPServer, socketserver  # noqa
+
+from kong.multivalue import single_metrics  # noqa
+from kong.reporter import Reporter  # noqa
+
+
+content_type = 'text/plain; version=0.0.4; charset=utf-8'
+default_interval = 10
+invalid_name_characters = re.compile('[^a-zA-Z0-9_]')
+
+
+def sanitized_name(name):
+    '''team-name -> team_name, 5xx -> _5xx, matching [a-zA-Z_][a-zA-Z0-9_]*'''
+    name = invalid_name_characters.sub('_', '{0}'.format(name))
+    return '_' + name if not name or name[0].isdigit() else name
+
+
+def metric_name(type_instance, metric_type):
+    '''kong.responses.count counter -> kong_responses_count_total'''
+    name = sanitized_name(type_instance)
+    return name + '_total' if metric_type == 'counter' else name
+
+
+def label_value(value):
+    return '{0}'.format(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def sample_value(value):
+    return repr(value) if isinstance(value, float) else str(int(value))
+
+
+def render(samples):
+    '''Renders (name, type, value, dimensions) samples in the text exposition format, grouping each name's samples
+    beneath a single TYPE line.
+    '''
+    families = {}
+    for name, metric_type, value, dimensions in samples:
+        if name not in families:
+            families[name] = (metric_type, [])
+        labels = ','.join(['{0}="{1}"'.format(sanitized_name(k), label_value(v))
+                           for k, v in sorted(dimensions.items())])
+        series = '{0}{{{1}}}'.format(name, labels) if labels else name
+        families[name][1].append('{0} {1}\n'.format(series, sample_value(value)))
+    lines = []
+    for name in sorted(families):
+        metric_type, family_lines = families[name]
+        lines.append('# TYPE {0} {1}\n'.format(name, metric_type))
+        lines.extend(family_lines)
+    return ''.join(lines).encode('utf-8')
+
+
+class ExporterMetric(Reporter.metric_class):
+    '''Metric that retains its series and value for rendering.'''
+
+    def __init__(self, type_instance, metric_type, value, *args, **kwargs):
+        Reporter.metric_class.__init__(self, type_instance, metric_type, value, *args, **kwargs)
+        self.sample = (metric_name(type_instance, metric_type), metric_type, value, kwargs.get('dimensions') or {})
+
+
+class ExporterReporter(Reporter):
+    '''Reporter whose reads render their Metrics for Exporter instead of dispatching them to collectd.'''
+
+    metric_class = ExporterMetric
+
+    def __init__(self):
+        super(ExporterReporter, self).__init__()
+        self.samples = []
+
+    def emit_metrics(self, metrics):
+        self.samples = [metric.sample for metric in single_metrics(metrics)]
+
+
+class Exporter(object):
+    '''Refreshes an ExporterReporter every interval from a daemon thread, swapping in the rendered read for
+    /metrics scrapes.  A failed refresh leaves the previous read in place and is counted.
+
+    exporter = Exporter(reporter, interval=10)
+    exporter.start('127.0.0.1', 9542)
+    '''
+
+    def __init__(self, reporter, interval=default_interval):
+        self.reporter = reporter
+        self.interval = interval
+        self.body = b''
+        self.samples = []
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.refresh_duration = 0
+        self.refreshed_at = 0
+        self.stopped = threading.Event()
+        self.server = None
+
+    def refresh(self):
+        t0 = time.time()
+        try:
+            self.reporter.update_and_report()
+            self.samples = self.reporter.samples
+            self.refreshes += 1
+            self.refreshed_at = time.time()
+        except Exception as e:
+            self.refresh_errors += 1
+            collectd.error('Failed to refresh Kong metrics: {0}'.format(e))
+        self.refresh_duration = time.time() - t0
+        self.body = render(self.samples + self.exporter_samples())
+
+    def exporter_samples(self):
+        return [('kong_exporter_refreshes_total', 'counter', self.refreshes, {}),
+                ('kong_exporter_refresh_errors_total', 'counter', self.refresh_errors, {}),
+                ('kong_exporter_refresh_duration_seconds', 'gauge', self.refresh_duration, {}),
+                ('kong_exporter_last_refresh_timestamp_seconds', 'gauge', self.refreshed_at, {})]
+
+    def run(self):
+        while not self.stopped.is_set():
+            t0 = time.time()
+            self.refresh()
+            self.stopped.wait(max(0, self.interval - (time.time() - t0)))
+
+    def create_server(self, host='127.0.0.1', port=9542):
+        server = ExporterServer((host, port), ExporterHandler)
+        server.exporter = self
+        return server
+
+    def start(self, host='127.0.0.1', port=9542):
+        '''Refreshes once, then refreshes and serves from daemon threads, returning the server address.'''
+        self.refresh()
+        self.server = self.create_server(host, port)
+        for target in (self.run_after_interval, self.server.serve_forever):
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+        return self.server.server_address[:2]
+
+    def run_after_interval(self):
+        if not self.stopped.wait(self.interval):
+            self.run()
+
+    def stop(self):
+        self.stopped.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+class ExporterHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.exporter.body  # Replaced, never mutated, by refreshes
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ExporterServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+
+
+def main():
+    import argparse
+    from collectdutil.utils import ParsedConfig
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', help='File of collectd Module block directives (default Config)')
+    parser.add_argument('--listen', default='127.0.0.1:9542', help='host:port to serve /metrics on')
+    parser.add_argument('--interval', type=float, help='Seconds between refreshes (default Interval or 10)')
+    args = parser.parse_args()
+
+    config_string = ''
+    if args.config:
+        with open(args.config) as f:
+            config_string = f.read()
+    reporter = ExporterReporter()
+    reporter.load_config(ParsedConfig(config_string))
+    interval = args.interval or reporter.config.interval or default_interval
+    host, port = args.listen.rsplit(':', 1)
+    exporter = Exporter(reporter, interval)
+    print('Serving http://{0}:{1}/metrics'.format(*exporter.start(host, int(port))))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        exporter.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+'''A local stand-in for the kong-plugin-signalfx /signalfx status endpoint serving synthetic or captured payloads
+with configurable latency, chunked transfer, gzip, TLS (optionally requiring client certificates), and injected
+errors and timeouts, for load and latency testing of KongState on a single machine.  It can listen on a Unix domain
+socket instead of TCP.  Requests for /status are served the server and database sections of the last payload.
+
+python -m kong.fakekong --port 8001 --contexts 100000 --latency .2 --gzip
+python -m kong.fakekong --socket /tmp/kong.sock --contexts 100000
+python -m kong.fakekong --port 8443 --captures /var/tmp/kong-captures --certfile cert.pem --client-ca ca.pem
+'''
+from __future__ import absolute_import, print_function
+import gzip
+import io
+import itertools
+import json
+import os
+import random
+import ssl
+import threading
+import time
+
+from six.moves import BaseHTTPServer, socketserver
+
+from kong.capture import captures, load_payload
+from kong.synthetic import SyntheticStatus
+
+
+class PayloadSource(object):
+    '''Serialized status payloads from a SyntheticStatus, advanced on each request unless static,
+    or cycled through captured payload files.'''
+
+    def __init__(self, synthetic=None, capture_paths=None, static=False):
+        self.lock = threading.Lock()
+        self.synthetic = synthetic or SyntheticStatus()
+        self.capture_paths = itertools.cycle(capture_paths) if capture_paths else None
+        self.static = static
+        self.payload = None
+
+    def next(self):
+        with self.lock:
+            if self.payload is not None and self.static:
+                return self.payload
+            if self.capture_paths:
+                self.payload = load_payload(next(self.capture_paths))
+            else:
+                self.payload = json.dumps(self.synthetic.snapshot()).encode('utf-8')
+            return self.payload
+
+    def status(self):
+        '''The server and database sections of the last payload, as served by the Admin API's /status.'''
+        with self.lock:
+            payload = self.payload
+        status = json.loads((payload if payload is not None else self.next()).decode('utf-8'))
+        return json.dumps(dict(server=status['server'], database=status['database'])).encode('utf-8')
+
+
+class FakeKongHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'  # Allow connection reuse
+
+    def setup(self):
+        self.disable_nagle_algorithm = isinstance(self.client_address, tuple)  # TCP_NODELAY like nginx, over TCP
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+
+    def do_GET(self):
+        kong = self.server.fake_kong
+        kong.requests += 1
+        if kong.random.random() < kong.timeout_rate:
+            time.sleep(kong.hang)
+            self.close_connection = True
+            return
+        if kong.random.random() < kong.error_rate:
+            self.send_error(500, 'Injected error')
+            return
+        if kong.latency:
+            time.sleep(kong.latency)
+
+        body = kong.source.status() if self.path.split('?')[0] == '/status' else kong.source.next()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if kong.gzip and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            buf = io.BytesIO()
+            f = gzip.GzipFile(fileobj=buf, mode='wb')
+            f.write(body)
+            f.close()
+            body = buf.getvalue()
+            self.send_header('Content-Encoding', 'gzip')
+        if not kong.chunk_size:
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i in range(0, len(body), kong.chunk_size):
+            chunk = body[i:i + kong.chunk_size]
+            self.wfile.write('{0:x}\r\n'.format(len(chunk)).encode('ascii') + chunk + b'\r\n')
+        self.wfile.write(b'0\r\n\r\n')
+
+    def address_string(self):
+        if not isinstance(self.client_address, tuple):  # Unix domain socket clients are unnamed
+            return self.server.server_address
+        return BaseHTTPServer.BaseHTTPRequestHandler.address_string(self)
+
+    def log_message(self, format, *args):
+        if self.server.fake_kong.verbose:
+            BaseHTTPServer.BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class FakeKongServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+
+
+class FakeKongUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    daemon_threads = True
+
+
+class FakeKong(object):
+    '''Serves a PayloadSource at any path.
+
+    fk = FakeKong(PayloadSource(SyntheticStatus.with_contexts(10000)), latency=.1, gzip=True)
+    url = fk.start()  # 'http://127.0.0.1:<port>/signalfx'
+    url = fk.start(socket_path='/tmp/kong.sock')  # 'unix:///tmp/kong.sock:/signalfx'
+    ...
+    fk.stop()
+    '''
+
+    def __init__(self, source=None, latency=0, chunk_size=0, gzip=False, error_rate=0, timeout_rate=0, hang=30,
+                 certfile=None, keyfile=None, client_ca=None, seed=0, verbose=False):
+        self.source = source or PayloadSource()
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.gzip = gzip
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.client_ca = client_ca
+        self.random = random.Random(seed)
+        self.verbose = verbose
+        self.requests = 0
+        self.server = None
+        self.socket_path = None
+
+    def create_server(self, host='127.0.0.1', port=0, socket_path=None):
+        '''Returns a server on host and port, or on the Unix domain socket socket_path, replacing any stale socket
+        file.  TLS is only served over TCP.
+        '''
+        self.socket_path = socket_path
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            server = FakeKongUnixServer(socket_path, FakeKongHandler)
+            server.fake_kong = self
+            return server
+        server = FakeKongServer((host, port), FakeKongHandler)
+        server.fake_kong = self
+        if self.certfile:
+            context = ssl.SSLContext(getattr(ssl, 'PROTOCOL_TLS_SERVER', ssl.PROTOCOL_SSLv23))
+            context.load_cert_chain(self.certfile, self.keyfile)
+            if self.client_ca:
+                context.verify_mode = ssl.CERT_REQUIRED
+                context.load_verify_locations(self.client_ca)
+            server.socket = context.wrap_socket(server.socket, server_side=True)
+        return server
+
+    @property
+    def url(self):
+        if self.socket_path:
+            return 'unix://{0}:/signalfx'.format(self.socket_path)
+        host, port = self.server.server_address[:2]
+        return '{0}://{1}:{2}/signalfx'.format('https' if self.certfile else 'http', host, port)
+
+    def start(self, host='127.0.0.1', port=0, socket_path=None):
+        '''Serves from a daemon thread, returning the status URL.'''
+        self.server = self.create_server(host, port, socket_path)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--socket', help='Unix domain socket path to listen on instead of --host and --port')
+    parser.add_argument('--contexts', type=int, default=1000, help='Approximate number of synthetic contexts')
+    parser.add_argument('--churn', type=float, default=0, help='Fraction of resources renamed between requests')
+    parser.add_argument('--static', action='store_true', help='Serve the same payload for every request')
+    parser.add_argument('--captures', nargs='+', help='Capture files or directories to cycle through instead')
+    parser.add_argument('--latency', type=float, default=0, help='Seconds to wait before each response')
+    parser.add_argument('--chunk-size', type=int, default=0, help='Use chunked transfer with chunks of this size')
+    parser.add_argument('--gzip', action='store_true', help='gzip responses to clients accepting it')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with a 500')
+    parser.add_argument('--timeout-rate', type=float, default=0, help='Fraction of requests left unanswered')
+    parser.add_argument('--hang', type=float, default=30, help='Seconds to hold unanswered requests')
+    parser.add_argument('--certfile', help='Server certificate for TLS')
+    parser.add_argument('--keyfile', help='Server certificate key if not included in --certfile')
+    parser.add_argument('--client-ca', help='CA bundle to require and verify client certificates with')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    capture_paths = []
+    for path in args.captures or []:
+        capture_paths.extend(captures(path) if os.path.isdir(path) else [path])
+    source = PayloadSource(SyntheticStatus.with_contexts(args.contexts, churn=args.churn), capture_paths,
+                           static=args.static)
+    kong = FakeKong(source, latency=args.latency, chunk_size=args.chunk_size, gzip=args.gzip,
+                    error_rate=args.error_rate, timeout_rate=args.timeout_rate, hang=args.hang,
+                    certfile=args.certfile, keyfile=args.keyfile, client_ca=args.client_ca, verbose=args.verbose)
+    server = kong.create_server(args.host, args.port, args.socket)
+    kong.server = server
+    print('Serving {0}'.format(kong.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+        if args.socket:
+            os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+'''Serves the internals of a running Reporter as JSON over a Unix domain socket or loopback HTTP from a daemon
+thread: context cache and group plan sizes, cache hit counts, PatternList usage, and histograms of the stage timings
+of recent reads.  Reads publish their state by replacing immutable references, so requests never block them.
+
+curl --unix-socket /var/run/collectd-kong.sock http://localhost/
+curl http://127.0.0.1:9543/
+'''
+from __future__ import absolute_import
+import json
+import os
+import threading
+import time
+
+from six.moves import BaseHTTPServer, socketserver
+
+
+recent_reads = 100  # Reads whose stage timings are kept for histograms
+bucket_bounds = (.001, .002, .005, .01, .02, .05, .1, .2, .5, 1, 2, 5, 10, 20, 50)  # Histogram bucket upper seconds
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def stage_histograms(recent):
+    '''Returns {stage: {count, min, median, p90, max, buckets}} of the stage timings of recent reads, each bucket
+    being the [upper bound seconds, reads] of bucket_bounds followed by [None, reads] beyond the last.
+    '''
+    durations = {}
+    for timings in recent:
+        for stage, duration in timings.items():
+            durations.setdefault(stage, []).append(duration)
+    histograms = {}
+    for stage, values in durations.items():
+        values.sort()
+        counts = [0] * (len(bucket_bounds) + 1)
+        bucket = 0
+        for value in values:
+            while bucket < len(bucket_bounds) and value > bucket_bounds[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+        histograms[stage] = dict(count=len(values), min=values[0], median=percentile(values, .5),
+                                 p90=percentile(values, .9), max=values[-1],
+                                 buckets=[list(b) for b in zip(bucket_bounds + (None,), counts)])
+    return histograms
+
+
+def group_sizes(groups):
+    '''Returns the number of groups, their contexts, and the largest group's contexts.'''
+    sizes = [len(group) for group in groups if isinstance(group, (set, frozenset))]
+    return dict(groups=len(groups), contexts=sum(sizes), largest=max(sizes) if sizes else 0)
+
+
+class Introspection(object):
+    '''Holds the state published by a Reporter after each read and serves it, along with the stage timing
+    histograms of the most recent reads, from a daemon thread.  Published values are replaced, never mutated, so
+    requests read a consistent state without locking.
+
+    introspection = Introspection(socket_path='/var/run/collectd-kong.sock')
+    introspection.start()
+    introspection.publish(dict(contexts=10), reporter.stage_timings, reporter.http_method_scoped_groups)
+    '''
+
+    def __init__(self, socket_path=None, port=None, reads=recent_reads):
+        self.socket_path = socket_path
+        self.port = port
+        self.reads = reads
+        self.state = {}
+        self.recent = ()  # Stage timings of the most recent reads
+        self.groups = ()
+        self.published_reads = 0
+        self.failed_reads = 0
+        self.last_error = None
+        self.started_at = time.time()
+        self.server = None
+
+    def publish(self, state, stage_timings, groups):
+        self.recent = self.recent[1 - self.reads:] + (stage_timings,) if self.reads > 1 else (stage_timings,)
+        self.groups = groups
+        self.state = state
+        self.published_reads += 1
+
+    def failed(self, error):
+        self.failed_reads += 1
+        self.last_error = dict(time=time.time(), error='{0}: {1}'.format(type(error).__name__, error))
+
+    def snapshot(self):
+        '''Returns the JSON-serializable published state.'''
+        snapshot = dict(self.state)
+        snapshot.update(reads=self.published_reads, failed_reads=self.failed_reads, last_error=self.last_error,
+                        uptime=time.time() - self.started_at, group_plan_sizes=group_sizes(self.groups),
+                        stages=stage_histograms(self.recent))
+        return snapshot
+
+    def create_server(self):
+        if self.socket_path:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            server = IntrospectionUnixServer(self.socket_path, IntrospectionHandler)
+        else:
+            server = IntrospectionServer(('127.0.0.1', int(self.port)), IntrospectionHandler)
+        server.introspection = self
+        return server
+
+    def start(self):
+        '''Serves from a daemon thread.'''
+        self.server = self.create_server()
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        if not self.server:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class IntrospectionHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/':
+            self.send_error(404)
+            return
+        body = json.dumps(self.server.introspection.snapshot(), indent=2, sort_keys=True).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class IntrospectionServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+
+
+class IntrospectionUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    daemon_threads = True
@@ -0,0 +1,47 @@
+'''Selects the JSON decoder status payloads are parsed with: the first importable of orjson, ujson, and simplejson,
+falling back to the standard library.  simplejson is only preferred on Python 2, as the standard library decodes
+faster on Python 3.  Each backend's loads takes the response body bytes directly, without first decoding them to text.
+
+name, loads = select_backend()  # e.g. ('orjson', orjson.loads)
+status = loads(r.content)
+'''
+from __future__ import absolute_import
+import sys
+
+backends = ('orjson', 'ujson', 'simplejson', 'json')
+preference = backends if sys.version_info[0] == 2 else ('orjson', 'ujson', 'json')
+selected = {}  # Preferred backend (None for the first importable) to selected (name, loads)
+
+
+def backend_loads(name):
+    '''Returns the loads function of backend name accepting bytes or text, raising ImportError if unavailable.'''
+    if name == 'orjson':
+        from orjson import loads
+    elif name == 'ujson':
+        from ujson import loads
+    elif name == 'simplejson':
+        from simplejson import loads
+    elif name == 'json':
+        from json import loads
+        if (3, 0) <= sys.version_info < (3, 6):  # bytes not accepted before 3.6
+
+            def text_loads(s, loads=loads):
+                return loads(s.decode('utf-8') if isinstance(s, bytes) else s)
+            return text_loads
+    else:
+        raise ValueError('Unknown JSON backend {0}.  Please use one of: {1}.'.format(name, ', '.join(backends)))
+    return loads
+
+
+def select_backend(preferred=None):
+    '''Returns the (name, loads) of the preferred backend, or of the first importable backend if preferred is None.'''
+    if preferred in selected:
+        return selected[preferred]
+    for name in [preferred] if preferred else preference:
+        try:
+            selected[preferred] = name, backend_loads(name)
+            break
+        except ImportError:
+            if preferred:
+                raise
+    return selected[preferred]
@@ -2,9 +2,11 @@ from collections import defaultdict
 from hashlib import md5
 import time
 
-from requests import get
 import collectd
 
+from kong.jsonbackend import select_backend
+from kong.utils import intern_value
+
 
 # kong-plugin-signalfx context and metric encoding schemes
 supported_sfx_versions = (1,)
@@ -17,6 +19,11 @@ server_tokens = ('connections_handled', 'connections_accepted', 'connections_wai
                  'connections_reading', 'connections_writing', 'total_requests')
 # kong db status
 database_tokens = ('database_reachable',)
+# decoded_contexts size relative to the current read's contexts beyond which absent contexts are pruned
+decoded_context_slack = 1.25
+# Context without resource descriptors that contexts beyond MaxContexts are summed into
+overflow_context = u'\x1f'.join([u'1'] + [u'\x00'] * (len(context_tokens[1]) - 1))
+response_chunk_size = 65536  # Bytes read at a time when limiting response size
 
 
 class KongException(Exception):
@@ -24,6 +31,58 @@ class KongException(Exception):
     pass
 
 
+class ResponseTooLarge(KongException):
+
+    pass
+
+
+def fold_resource_metrics(encoded_metrics, sums, status_sums, ver=1):
+    '''Adds encoded resource metrics to sums ({metric: sum}) and status_sums ({status code: {metric: sum}})
+    without forming per-context records.
+    '''
+    if ver not in supported_sfx_versions:
+        raise KongException('Unsupported sfx version: {0}.'.format(ver))
+    metric_values = encoded_metrics.split(',')
+    met_tokens = metric_tokens[ver]
+    status_idx = len(met_tokens)
+    for token, val in zip(met_tokens, metric_values[:status_idx]):
+        sums[token] = sums.get(token, 0) + int(val)
+    sc_tokens = status_tokens[ver][1:]
+    for encoded_vals in metric_values[status_idx:]:
+        status_values = encoded_vals.split(':')
+        sc_sums = status_sums.get(status_values[0])
+        if sc_sums is None:
+            sc_sums = status_sums[intern_value(status_values[0])] = {}
+        for token, val in zip(sc_tokens, status_values[1:]):
+            sc_sums[token] = sc_sums.get(token, 0) + int(val)
+
+
+def encode_resource_metrics(sums, status_sums, ver=1):
+    '''Returns the encoded resource metrics of sums ({metric: sum}) and status_sums ({status code: {metric: sum}}).'''
+    values = [str(sums.get(token, 0)) for token in metric_tokens[ver]]
+    for status_code, sc_sums in status_sums.items():
+        values.append(':'.join([status_code] + [str(sc_sums.get(token, 0)) for token in status_tokens[ver][1:]]))
+    return ','.join(values)
+
+
+def decode_resource_context(resource_context, context_hash=None):
+    '''Returns the (context hash, decoded context) decoded_contexts entry of an encoded resource context.  Context
+    values are interned, so contexts sharing a value share its instance.
+    '''
+    context_values = resource_context.split('\x1f')
+    sfx_ver = int(context_values[0])
+    if context_hash is None:
+        context_hash = md5(resource_context.encode('utf-8')).hexdigest()
+    context_entry = dict(resource_context=resource_context)
+    for descriptor, value in zip(context_tokens[sfx_ver], context_values):
+        if value == '\x00':
+            value = None
+        else:
+            value = intern_value(value)
+        context_entry[descriptor] = value
+    return context_hash, context_entry
+
+
 class KongState(object):
     '''A basic client for SignalFx's Kong plugin that forms raw metric datastores and various indices for
     dimension-based aggregations.
@@ -32,18 +91,36 @@ class KongState(object):
     ks.update_from_sfx()
     '''
 
-    decoded_contexts = {}
+    decoded_contexts = {}  # Shared by default.  Pass a dict to retain contexts per client.
 
     def __init__(self, url='http://localhost:8001/signalfx', auth_header=None, verify_certs=False, ca_bundle=None,
-                 client_cert=None, client_cert_key=None, verbose=False):
+                 client_cert=None, client_cert_key=None, verbose=False, session=None, recorder=None,
+                 decoded_contexts=None, decode_metrics=True, streaming=None, json_backend=None,
+                 max_response_bytes=None, max_contexts=None):
+        if decoded_contexts is not None:
+            self.decoded_contexts = decoded_contexts
         self.url = url
+        self.session = session  # Optional requests.Session for connection reuse between reads
+        self.recorder = recorder  # Optional PayloadRecorder capturing raw responses
         self.auth_header = auth_header
         self.verify_certs = verify_certs
         self.ca_bundle = ca_bundle
         self.client_cert = client_cert
         self.client_cert_key = client_cert_key
         self.verbose = verbose
+        self.timings = {}  # Durations of the most recent update stages
+        self.payload_bytes = 0
+        self.context_cache_hits = 0
+        self.context_cache_misses = 0
+        self.decode_metrics = decode_metrics  # Whether to decode resource metrics or only retain them encoded
+        self.streaming = streaming  # Optional StreamingAggregator folding resource metrics while parsing
+        self.max_response_bytes = max_response_bytes  # Response size beyond which the request is aborted
+        self.max_contexts = max_contexts  # Contexts beyond which the rest are summed into overflow_context
+        self.context_count = 0
+        self.overflow_contexts = 0
+        self.json_backend, self.json_loads = select_backend(json_backend)  # Preferred name, or the fastest
         self.resource_metrics = {}
+        self.encoded_metrics = {}  # Context hash to encoded resource metrics when not decoding
         self.server_metrics = {}
         self.database_metrics = {}
         # index sets: mappings from resource descriptors to sets of
@@ -57,11 +134,19 @@ class KongState(object):
         self.http_methods = defaultdict(set)
         self.status_codes = defaultdict(set)
 
-    def update_from_sfx(self):
+    def update_from_sfx(self, resources=True):
+        '''Fetches the status view and updates all metric holders.  Resource metric decoding and indexing is
+        skipped when resources is False, which is sufficient for server and database gauge sampling.
+        '''
         status = self.get_sfx_view()
+        if not resources:
+            self.update_server_metrics(status['server'])
+            self.update_database_metrics(status['database'])
+            return
         t0 = time.time()
         self.update_resource_metrics(status['signalfx'])
         t1 = time.time()
+        self.timings['index'] = t1 - t0
         self.update_server_metrics(status['server'])
         self.update_database_metrics(status['database'])
         if self.verbose:
@@ -76,34 +161,111 @@ class KongState(object):
         kw['verify'] = self.ca_bundle if self.ca_bundle else self.verify_certs
         if self.client_cert:
             kw['cert'] = self.client_cert if not self.client_cert_key else (self.client_cert, self.client_cert_key)
-        r = get(**kw)
+        if self.max_response_bytes:
+            kw['stream'] = True
+        if self.session:
+            r = self.session.get(**kw)
+        else:
+            from requests import get  # Deferred from collectd startup
+            r = get(**kw)
+        content = self.read_content(r) if self.max_response_bytes else r.content
         t1 = time.time()
-        data = r.json()
+        if self.recorder:
+            self.recorder.record(content)
+        data = self.json_loads(content)
         t2 = time.time()
+        self.timings['get'] = t1 - t0
+        self.timings['json'] = t2 - t1
+        self.payload_bytes = len(content)
         if self.verbose:
-            collectd.info('GET(): {0}, json(): {1}'.format(t1 - t0, t2 - t1))
+            collectd.info('GET(): {0}, {1}.loads(): {2}'.format(t1 - t0, self.json_backend, t2 - t1))
         return data
 
+    def read_content(self, r):
+        '''Returns the body of streamed response r, closing it and raising ResponseTooLarge as soon as it exceeds
+        max_response_bytes.
+        '''
+        length = r.headers.get('Content-Length')
+        if length and not r.headers.get('Content-Encoding') and int(length) > self.max_response_bytes:
+            r.close()
+            raise ResponseTooLarge('Status response of {0} bytes exceeds MaxResponseBytes {1}.'.format(
+                length, self.max_response_bytes))
+        chunks, size = [], 0
+        for chunk in r.iter_content(response_chunk_size):
+            size += len(chunk)
+            if size > self.max_response_bytes:
+                r.close()
+                raise ResponseTooLarge('Aborted status response exceeding MaxResponseBytes {0}.'.format(
+                    self.max_response_bytes))
+            chunks.append(chunk)
+        return b''.join(chunks)
+
     def update_resource_metrics(self, sfx):
+        self.context_count = len(sfx)
+        if self.max_contexts and len(sfx) > self.max_contexts:
+            sfx = self.cap_contexts(sfx)
+        if self.streaming:
+            self.fold_resource_metrics(sfx)
+            return
         for resource_context in sfx:
             context_hash = self.load_resource_context(resource_context)
+            if not self.decode_metrics:
+                self.encoded_metrics[context_hash] = sfx[resource_context]
+                continue
             resource_metrics = self.decode_resource_metrics(sfx[resource_context], context_hash)
             self.resource_metrics[context_hash].update(resource_metrics)
+        if len(self.decoded_contexts) > len(sfx) * decoded_context_slack:
+            self.prune_decoded_contexts(sfx)
+
+    def fold_resource_metrics(self, sfx):
+        '''Folds each context's metrics into the StreamingAggregator without resource_metrics entries or index sets.'''
+        for resource_context in sfx:
+            self.streaming.fold(self.decoded_context(resource_context)[1], sfx[resource_context])
+        if len(self.decoded_contexts) > len(sfx) * decoded_context_slack:
+            self.prune_decoded_contexts(sfx)
+
+    def cap_contexts(self, sfx):
+        '''Returns sfx limited to max_contexts contexts and overflow_context, whose metrics are the sums of all others.
+        Contexts in the decoded_contexts cache are kept first, so the same contexts are kept by consecutive reads.
+        '''
+        kept = {}
+        for resource_context in sfx:
+            if len(kept) == self.max_contexts:
+                break
+            if resource_context in self.decoded_contexts and resource_context != overflow_context:
+                kept[resource_context] = sfx[resource_context]
+        sums, status_sums = {}, {}
+        for resource_context in sfx:
+            if resource_context in kept:
+                continue
+            if len(kept) < self.max_contexts and resource_context != overflow_context:
+                kept[resource_context] = sfx[resource_context]
+            else:
+                fold_resource_metrics(sfx[resource_context], sums, status_sums)
+        self.overflow_contexts = len(sfx) - len(kept)
+        kept[overflow_context] = encode_resource_metrics(sums, status_sums)
+        return kept
+
+    def prune_decoded_contexts(self, current_contexts):
+        '''Removes decoded contexts absent from current_contexts so renamed and removed resources don't
+        accumulate.  Pruning in place keeps the cache shared with other KongState instances.
+        '''
+        for resource_context in [c for c in self.decoded_contexts if c not in current_contexts]:
+            del self.decoded_contexts[resource_context]
+
+    def decoded_context(self, resource_context):
+        '''Returns the cached (context hash, decoded context) of resource_context, decoding it if necessary.'''
+        decoded = self.decoded_contexts.get(resource_context)
+        if decoded is not None:
+            self.context_cache_hits += 1
+            return decoded
+        self.context_cache_misses += 1
+        decoded = self.decoded_contexts[resource_context] = decode_resource_context(resource_context)
+        return decoded
 
     def load_resource_context(self, resource_context):
         '''Obtains or caches decoded resource context if necessary, creating resource_metrics entry space.'''
-        if resource_context not in self.decoded_contexts:
-            context_values = resource_context.split('\x1f')
-            sfx_ver = int(context_values[0])
-            context_hash = md5(resource_context.encode('utf-8')).hexdigest()
-            context_entry = dict(resource_context=resource_context)
-            for descriptor, value in zip(context_tokens[sfx_ver], context_values):
-                if value == '\x00':
-                    value = None
-                context_entry[descriptor] = value
-            self.decoded_contexts[resource_context] = context_hash, context_entry
-
-        context_hash, decoded_context = self.decoded_contexts[resource_context]
+        context_hash, decoded_context = self.decoded_context(resource_context)
         self.resource_metrics[context_hash] = decoded_context.copy()  # Copy to avoid adding metrics to the master
 
         for descriptor, value in decoded_context.items():  # Update index sets
@@ -127,7 +289,7 @@ class KongState(object):
         sc_tokens = status_tokens[ver]
         for encoded_vals in metric_values[status_idx:]:
             status_values = encoded_vals.split(':')
-            sc = status_values[0]
+            sc = intern_value(status_values[0])
             self.status_codes[sc].add(context_hash)
             statuses[sc] = {}
             for token, val in zip(sc_tokens[1:], status_values[1:]):
@@ -0,0 +1,78 @@
+from __future__ import absolute_import
+
+import collectd
+
+
+traffic_type = 'kong_traffic'  # Multi-value type of types.db
+traffic_metrics = ('response_count', 'response_size', 'request_size', 'upstream_latency')  # Its data source order
+reserved_characters = frozenset('[],=')  # Delimiters of the plugin_instance encoding, which has no escaping
+max_plugin_instance = 127  # collectd's DATA_MAX_NAME_LEN less its terminating null
+
+
+def plugin_instance(dimensions):
+    '''Encodes dimensions as a [dimension=value,...] plugin_instance, as parsed by SignalFx's metadata plugin.'''
+    return '[{0}]'.format(','.join(['{0}={1}'.format(d, v) for d, v in sorted(dimensions.items())]))
+
+
+def encodable(dimensions):
+    '''Whether dimensions can be encoded as a plugin_instance that collectd won't truncate and that parses back to
+    the same dimensions.
+    '''
+    for dimension, value in dimensions.items():
+        if reserved_characters.intersection(u'{0}{1}'.format(dimension, value)):
+            return False
+    return len(plugin_instance(dimensions)) <= max_plugin_instance
+
+
+class MultiValueMetric(object):
+    '''The traffic counters of a single dimension set, dispatched as one multi-value kong_traffic collectd
+    value instead of a value per metric.  metrics are the single value Metrics it replaces.
+    '''
+
+    def __init__(self, values, dimensions, metrics, host=None):
+        self.values = values
+        self.dimensions = dimensions
+        self.metrics = metrics
+        self.host = host
+
+    def emit(self):
+        values = collectd.Values(plugin='kong', plugin_instance=plugin_instance(self.dimensions), type=traffic_type,
+                                 values=self.values)
+        if self.host:
+            values.host = self.host
+        values.dispatch()
+
+
+def combine_traffic_counters(counters, host=None):
+    '''Returns the Metrics of (metric, Metrics, status code scoped) counters, replacing the traffic metrics of
+    each dimension set having all of them with a MultiValueMetric.  Metrics of a dimension set share their
+    dimensions (see DimensionSets), so they are matched by identity.  Dimension sets that can't be encoded as a
+    plugin_instance are dispatched individually.
+    '''
+    combined = []
+    traffic = {}  # id of dimensions to (dimensions, {metric: Metric})
+    for metric, metrics, _ in counters:
+        if metric not in traffic_metrics:
+            combined.extend(metrics)
+            continue
+        for m in metrics:
+            dimensions, members = traffic.setdefault(id(m.dimensions), (m.dimensions, {}))
+            if metric in members:  # Not a single dimension set.  Dispatched individually
+                combined.append(m)
+            else:
+                members[metric] = m
+    for dimensions, members in traffic.values():
+        if len(members) == len(traffic_metrics) and encodable(dimensions):
+            combined.append(MultiValueMetric([members[metric].value for metric in traffic_metrics], dimensions,
+                                             [members[metric] for metric in traffic_metrics], host))
+        else:
+            combined.extend(members.values())
+    return combined
+
+
+def single_metrics(metrics):
+    '''Returns metrics with each MultiValueMetric replaced by the Metrics it combines.'''
+    singles = []
+    for metric in metrics:
+        singles.extend(getattr(metric, 'metrics', (metric,)))
+    return singles
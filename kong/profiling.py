@@ -0,0 +1,103 @@
+from __future__ import absolute_import
+import cProfile
+import os
+import time
+
+import collectd
+
+try:
+    import tracemalloc
+except ImportError:  # Python < 3.4
+    tracemalloc = None
+
+
+trigger_file = 'profile'  # Placed in ProfileDirectory with the number of upcoming reads to profile
+top_allocations = 25  # Allocation sites written for each tracemalloc snapshot and comparison
+
+
+class ReadProfiler(object):
+    '''Profiles reads with cProfile and optionally tracemalloc, writing the results to a directory:
+
+    '<prefix>.pstats': cProfile stats loadable by pstats.Stats
+    '<prefix>.stages': stage timings recorded by Reporter and KongState for the read
+    '<prefix>.tracemalloc': top allocation sites and their growth since the previous profiled read
+
+    A read is profiled if it is one of the first `reads` reads, if a trigger file containing a read count
+    has been placed in the directory (consumed on detection, so profiling can be requested without a restart),
+    or if `slower_than` is set, in which case every read is profiled but only those slower are written.  Profiling
+    roughly doubles the processing time of reads (about 2.3x when indexing 20000 contexts), so slower_than is best
+    enabled temporarily, with a threshold accounting for that overhead.
+    '''
+
+    def __init__(self, directory, reads=0, slower_than=None, trace_malloc=False):
+        self.directory = directory
+        self.reads = int(reads or 0)
+        self.slower_than = slower_than
+        self.trace_malloc = trace_malloc
+        self.read_count = 0
+        self.profile = None
+        self.requested = False
+        self.t0 = None
+        self.snapshot = None
+        if trace_malloc:
+            if tracemalloc is None:
+                collectd.warning('TraceMalloc requires Python 3.4 or later.  Ignoring.')
+                self.trace_malloc = False
+            elif not tracemalloc.is_tracing():
+                tracemalloc.start()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def check_trigger(self):
+        path = os.path.join(self.directory, trigger_file)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                self.reads += int(f.read().strip() or 1)
+        except ValueError:
+            collectd.warning('Invalid read count in {0}.  Profiling the next read.'.format(path))
+            self.reads += 1
+        os.remove(path)
+
+    def start(self):
+        self.read_count += 1
+        self.check_trigger()
+        self.requested = self.reads > 0
+        if self.requested:
+            self.reads -= 1
+        self.profile = None
+        if self.requested or self.slower_than is not None:
+            self.profile = cProfile.Profile()
+            self.t0 = time.time()
+            self.profile.enable()
+
+    def stop(self, stage_timings):
+        if self.profile is None:
+            return
+        self.profile.disable()
+        elapsed = time.time() - self.t0
+        if not self.requested and elapsed <= self.slower_than:
+            return
+        prefix = os.path.join(self.directory, 'kong-read-{0}-{1}'.format(time.strftime('%Y%m%dT%H%M%S'),
+                                                                         self.read_count))
+        self.profile.dump_stats(prefix + '.pstats')
+        with open(prefix + '.stages', 'w') as f:
+            f.write('elapsed: {0}\n'.format(elapsed))
+            for stage in sorted(stage_timings):
+                f.write('{0}: {1}\n'.format(stage, stage_timings[stage]))
+        if self.trace_malloc:
+            self.write_tracemalloc(prefix + '.tracemalloc')
+        collectd.info('Profiled read of {0} written to {1}.*'.format(elapsed, prefix))
+
+    def write_tracemalloc(self, path):
+        snapshot = tracemalloc.take_snapshot()
+        with open(path, 'w') as f:
+            f.write('Top {0} allocation sites:\n'.format(top_allocations))
+            for stat in snapshot.statistics('lineno')[:top_allocations]:
+                f.write('{0}\n'.format(stat))
+            if self.snapshot is not None:
+                f.write('\nTop {0} changes since previous snapshot:\n'.format(top_allocations))
+                for stat in snapshot.compare_to(self.snapshot, 'lineno')[:top_allocations]:
+                    f.write('{0}\n'.format(stat))
+        self.snapshot = snapshot
@@ -0,0 +1,130 @@
+'''Replays captured /signalfx responses through the full Reporter.update_and_report pipeline offline, reporting
+per-read stage timings, memory, and emitted series.
+
+python -m kong.replay --config kong.conf /var/tmp/kong-captures
+python -m kong.replay --config kong.conf --memory --series series.json capture_1.json.gz capture_2.json.gz
+'''
+from __future__ import absolute_import, print_function
+import json
+import os
+import sys
+import time
+
+try:
+    import collectd  # noqa
+except ImportError:  # Not within collectd's embedded interpreter
+    from collectdutil import fauxllectd
+    sys.modules['collectd'] = fauxllectd
+
+from kong.capture import captures, load_payload  # noqa
+from kong.multivalue import single_metrics  # noqa
+from kong.reporter import Reporter  # noqa
+
+try:
+    import tracemalloc
+except ImportError:  # Python < 3.4
+    tracemalloc = None
+
+
+class RecordedMetric(Reporter.metric_class):
+    '''Metric that retains its (type, type_instance) for series recording.'''
+
+    def __init__(self, type_instance, metric_type, *args, **kwargs):
+        Reporter.metric_class.__init__(self, type_instance, metric_type, *args, **kwargs)
+        self.metric_series = metric_type, type_instance
+
+
+class ReplayReporter(Reporter):
+    '''Reporter whose reads consume serialized status payloads in order instead of requesting the URL and that
+    records the series of each read's emitted metrics.  A None payload requests the URL for that read.
+    '''
+
+    metric_class = RecordedMetric
+
+    def __init__(self, config=None, payloads=()):
+        super(ReplayReporter, self).__init__()
+        self.config = config
+        self.payloads = list(payloads)
+        self.series = set()
+        self.datapoints = 0
+
+    def new_kong_state(self):
+        kong_state = super(ReplayReporter, self).new_kong_state()
+        payload = self.payloads.pop(0)
+        if payload is None:  # Request the configured URL
+            return kong_state
+        if callable(payload):
+            payload = payload()
+
+        def get_sfx_view():
+            t0 = time.time()
+            status = kong_state.json_loads(payload)
+            kong_state.timings['json'] = time.time() - t0
+            kong_state.payload_bytes = len(payload)
+            return status
+
+        kong_state.get_sfx_view = get_sfx_view
+        return kong_state
+
+    def emit_metrics(self, metrics):
+        self.datapoints = len(metrics)  # Dispatched values
+        self.series = set()
+        for metric in single_metrics(metrics):
+            metric_type, type_instance = metric.metric_series
+            self.series.add((metric_type, type_instance, tuple(sorted(metric.dimensions.items()))))
+        super(ReplayReporter, self).emit_metrics(metrics)
+
+
+def replay(config, payloads, memory=False):
+    '''Runs a read for each payload (bytes, str, a callable returning either, or None to request the configured URL),
+    yielding per-read results.
+    '''
+    reporter = ReplayReporter(config, payloads)
+    for read in range(len(reporter.payloads)):
+        if memory:
+            tracemalloc.start()
+        reporter.update_and_report()
+        result = dict(read=read, stages=dict(reporter.stage_timings), datapoints=reporter.datapoints,
+                      contexts=reporter.kong_state.context_count, json_backend=reporter.kong_state.json_backend,
+                      groups=len(reporter.http_method_scoped_groups), series=sorted(reporter.series))
+        if memory:
+            result['retained_bytes'], result['peak_bytes'] = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        yield result
+
+
+def main():
+    import argparse
+    from collectdutil.utils import ParsedConfig
+    from kong.config import Config
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('captures', nargs='+', help='Capture files or directories of captures, replayed in order')
+    parser.add_argument('--config', help='File of collectd Module block directives (default Config)')
+    parser.add_argument('--memory', action='store_true', help='Also trace memory (slows timings)')
+    parser.add_argument('--series', help='Path to write the emitted series of each read as JSON')
+    args = parser.parse_args()
+    if args.memory and tracemalloc is None:
+        parser.error('--memory requires Python 3.4 or later.')
+
+    paths = []
+    for path in args.captures:
+        paths.extend(captures(path) if os.path.isdir(path) else [path])
+    config_string = ''
+    if args.config:
+        with open(args.config) as f:
+            config_string = f.read()
+    config = Config(ParsedConfig(config_string))
+    payloads = [lambda path=path: load_payload(path) for path in paths]
+    series = []
+    for path, result in zip(paths, replay(config, payloads, args.memory)):
+        series.append(dict(path=path, series=result.pop('series')))
+        result['path'] = path
+        print(json.dumps(result, sort_keys=True))
+    if args.series:
+        with open(args.series, 'w') as f:
+            json.dump(series, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,12 +5,20 @@ import time
 from collectdutil.metrics import Metric
 import collectd
 
-from kong.utils import filter_by_pattern_lists
-from kong.kong_state import KongState
+from kong.utils import DimensionSets, filter_by_pattern_lists, intern_value, merge_group_sums
+from kong.derived import DerivedMetrics
+from kong.sampler import GaugeSampler
+from kong.budget import ReadBudget, degraded_config, detail_levels
+from kong.telemetry import Telemetry
+from kong.shared import SharedFetch, default_window, shared_fetch
+from kong.kong_state import KongState, ResponseTooLarge, metric_tokens
 from kong.grouper import Grouper
 from kong.config import Config
 
 
+status_code_metrics = ('response_count', 'upstream_latency', 'request_size', 'response_size')
+
+
 class Reporter(object):
     '''Gathers metric component values via KongState instances from which Metrics are built for each scope group
     assembled by Grouper.
@@ -31,114 +39,537 @@ class Reporter(object):
     'database_reachable': Instance
     '''
 
+    metric_class = Metric
+
     def __init__(self):
         # All gauge values need to be calculated from counter deltas
         self.kong_state = None  # Current KongState snapshot (provides group candidates)
+        self.decoded_contexts = {}  # Context cache retained between this Reporter's KongStates
         self.http_method_scoped_groups = []  # To be set by Grouper on each read
+        self.http_method_scoped_dimensions = []  # Reported dimensions of each http_method_scoped_groups member
+        self.dimension_sets = DimensionSets()  # Dimensions shared by groups and Metrics with equal dimensions
+        self.group_plan_key = None  # (Config fingerprint, context hashes) the current groups were formed from
+        self.group_plan_hits = 0
+        self.group_plan_misses = 0
         self.sc_hits_cache = set()
         self.sc_misses_cache = set()
+        self.derived_metrics = DerivedMetrics()  # Retains counter values between reads
+        self.gauge_sampler = GaugeSampler()  # Server and database gauges sampled between reads
+        self.session = None  # Pooled connections of reads, created on the first read
+        self.json_backend = None  # Name of the JSON decoder, selected by the first read
+        self.sample_session = None  # Pooled connection of the SampleInterval read thread
+        self.reuse_connections = False  # Whether new_kong_state creates the session (set by load_config)
+        self.read_budget = None  # Determines the detail level of each read when ReadTimeBudget is set
+        self.telemetry = None  # Records per-read processing statistics when Telemetry is set
+        self.profiler = None  # Profiles selected reads when ProfileDirectory is set
+        self.stage_timings = {}  # Durations of the most recent read's stages
+        self.recorder = None  # Captures raw status responses when CaptureDirectory is set
+        self.aggregator = None  # Sums group metrics in worker processes when AggregationProcesses is set
+        self.snapshot = None  # Group plan of a previous process when SnapshotFile is set
+        self.snapshot_written_at = None
+        self.overflowing = False  # Whether the last read summed contexts beyond MaxContexts
+        self.introspection = None  # Serves the state published by each read when an Introspection* directive is set
+        self.streaming = None  # Folds group sums while parsing when StreamingAggregation is set
+        self.shared_fetch = None  # KongState shared with other blocks polling the same URL when ShareFetch is set
+        self.shard = 0  # This Reporter's ReadShards shard, of which shard 0 also reports instance metrics
+        self.shared_plan = None  # Group plan split between ReadShards Reporters
+        self.fetcher = self  # Reporter whose new_kong_state the shards' shared fetches use
+        self.cache_lookups = {}  # Cumulative (hits, misses) of PatternList and group plan caches as of the last read
 
     def load_config_and_register_read(self, config):
-        self.config = Config(config)
+        self.load_config(config)
         read_kwargs = {}
         if self.config.interval:
             read_kwargs['interval'] = self.config.interval
         if self.config.name:
             read_kwargs['name'] = self.config.name
+        if self.aggregator:
+            collectd.register_shutdown(self.aggregator.close)
+        if self.introspection:
+            collectd.register_init(self.introspection.start)
+            collectd.register_shutdown(self.introspection.stop)
         collectd.register_read(self.update_and_report, **read_kwargs)
+        for reporter in self.shard_reporters()[1:]:  # Uniquely named, as collectd would name each alike
+            read_kwargs['name'] = '{0}.shard{1}'.format(self.config.name or 'kong.{0}'.format(id(self)),
+                                                        reporter.shard)
+            collectd.register_read(reporter.update_and_report, **read_kwargs)
+        if self.config.sample_interval:
+            sample_kwargs = dict(interval=self.config.sample_interval)
+            if self.config.name:
+                sample_kwargs['name'] = '{0}.sampler'.format(self.config.name)
+            collectd.register_read(self.sample_gauges, **sample_kwargs)
+
+    def load_config(self, config):
+        '''Sets the Config and creates the components it enables without registering any callbacks.'''
+        self.config = Config(config)
+        self.reuse_connections = True
+        if self.config.read_time_budget:
+            self.read_budget = ReadBudget(self.config.read_time_budget)
+        if self.config.telemetry:
+            self.telemetry = Telemetry(host=self.config.host)
+        # Engines importing heavier modules are only imported when enabled
+        if self.config.capture_directory:
+            from kong.capture import PayloadRecorder
+            self.recorder = PayloadRecorder(self.config.capture_directory, self.config.capture_files)
+        if self.config.profile_directory:
+            from kong.profiling import ReadProfiler
+            self.profiler = ReadProfiler(self.config.profile_directory, reads=self.config.profile_reads,
+                                         slower_than=self.config.profile_slower_than,
+                                         trace_malloc=self.config.trace_malloc)
+        if self.config.aggregation_processes:
+            from kong.aggregation import ShardedAggregator
+            self.aggregator = ShardedAggregator(self.config.aggregation_processes)
+        if self.config.introspection_socket or self.config.introspection_port:
+            from kong.introspection import Introspection
+            self.introspection = Introspection(self.config.introspection_socket, self.config.introspection_port)
+        if self.config.snapshot_file:
+            from kong.snapshot import load_snapshot
+            self.snapshot = load_snapshot(self.config.snapshot_file)
+            self.snapshot_written_at = time.time()
+        if self.config.share_fetch:
+            self.shared_fetch = shared_fetch(self.fetch_key(), self.config.interval)
+            self.decoded_contexts = self.shared_fetch.decoded_contexts
+        elif self.config.read_shards > 1:
+            self.shared_fetch = SharedFetch(self.config.interval or default_window)
+            self.decoded_contexts = self.shared_fetch.decoded_contexts
+
+    def shard_reporters(self):
+        '''Returns a Reporter for each of ReadShards shards, this Reporter being shard 0.  Shards share this
+        Reporter's Config, fetched KongStates, aggregator, and group plan, each reporting a balanced share of the
+        groups.
+        '''
+        if self.config.read_shards <= 1:
+            return [self]
+        from kong.shards import SharedPlan
+        self.shared_plan = SharedPlan(self.config.read_shards)
+        reporters = [self]
+        for shard in range(1, self.config.read_shards):
+            reporter = type(self)()
+            reporter.config = self.config
+            reporter.shard = shard
+            reporter.shared_plan = self.shared_plan
+            reporter.shared_fetch = self.shared_fetch
+            reporter.decoded_contexts = self.decoded_contexts
+            reporter.aggregator = self.aggregator
+            reporter.fetcher = self
+            reporters.append(reporter)
+        return reporters
+
+    def new_session(self):
+        from requests import Session  # Deferred from collectd startup to the first read
+        session = Session()
+        if self.config.socket_path:
+            from kong.unixsocket import UnixSocketAdapter
+            adapter = UnixSocketAdapter(self.config.socket_path)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        return session
+
+    def connection_options(self):
+        return dict(auth_header=self.config.auth_header, verify_certs=self.config.verify_certs,
+                    ca_bundle=self.config.ca_bundle, client_cert=self.config.client_cert,
+                    client_cert_key=self.config.client_cert_key, verbose=self.config.verbose,
+                    json_backend=self.config.json_backend,
+                    max_response_bytes=int(self.config.max_response_bytes or 0))
+
+    def new_kong_state(self):
+        if self.session is None and (self.reuse_connections or self.config.socket_path):
+            self.session = self.new_session()
+        kong_state = KongState(url=self.config.request_url, session=self.session, recorder=self.recorder,
+                               decoded_contexts=self.decoded_contexts, decode_metrics=self.aggregator is None,
+                               streaming=self.streaming, max_contexts=int(self.config.max_contexts or 0),
+                               **self.connection_options())
+        if self.json_backend is None:  # Resolved on the first read rather than at collectd startup
+            self.json_backend = kong_state.json_backend
+            collectd.info('Parsing Kong status with {0}.'.format(self.json_backend))
+        return kong_state
+
+    def fetch_key(self):
+        '''Identifies the requests and decoding of KongStates that may be shared between Reporters.'''
+        cfg = self.config
+        return (cfg.request_url, cfg.socket_path, tuple(cfg.auth_header or ()), cfg.verify_certs, cfg.ca_bundle,
+                cfg.client_cert, cfg.client_cert_key, cfg.max_response_bytes, cfg.max_contexts, self.aggregator is None)
+
+    def fetch_kong_state(self):
+        if self.shared_fetch:
+            return self.shared_fetch.kong_state(self.fetcher.new_kong_state)
+        kong_state = self.new_kong_state()
+        kong_state.update_from_sfx()
+        return kong_state
+
+    def sample_gauges(self):
+        '''Intermediate sample of server and database gauges from the lighter SampleURL (default /status), over
+        a session of its own as sampling runs in a separate read thread.
+        '''
+        if self.sample_session is None:
+            self.sample_session = self.new_session()
+        kong_state = KongState(url=self.config.sample_request_url, session=self.sample_session,
+                               **self.connection_options())
+        kong_state.update_from_sfx(resources=False)
+        self.add_gauge_samples(kong_state)
+
+    def add_gauge_samples(self, kong_state):
+        samples = {}
+        for metric_store in (kong_state.server_metrics, kong_state.database_metrics):
+            for metric, value in metric_store.items():
+                if self.config.metrics[metric][1] == 'gauge' and getattr(self.config, metric):
+                    samples[metric] = value
+        self.gauge_sampler.add(samples)
 
     def update_and_report(self):
+        self.stage_timings = {}  # Not carried over from the previous read should this one fail
+        if not self.profiler:
+            return self.update_and_report_within_budget()
+        self.profiler.start()
+        try:
+            self.update_and_report_within_budget()
+        finally:
+            self.profiler.stop(self.stage_timings)
+
+    def update_and_report_within_budget(self):
+        if not self.read_budget:
+            return self.update_and_report_metrics()
         t0 = time.time()
-        self.kong_state = KongState(url=self.config.url, auth_header=self.config.auth_header,
-                                    verify_certs=self.config.verify_certs, ca_bundle=self.config.ca_bundle,
-                                    client_cert=self.config.client_cert, client_cert_key=self.config.client_cert_key,
-                                    verbose=self.config.verbose)
-        self.kong_state.update_from_sfx()
+        config, level = self.config, self.read_budget.level
+        self.config = degraded_config(config, level)
+        try:
+            self.update_and_report_metrics()
+        finally:
+            self.config = config
+        elapsed = time.time() - t0
+        next_level = self.read_budget.update(elapsed)
+        if next_level > level:
+            collectd.warning('Read took {0} exceeding ReadTimeBudget {1}.  Reducing detail to {2}.'
+                             .format(elapsed, self.read_budget.budget, detail_levels[next_level]))
+        elif next_level < level:
+            collectd.info('Reads within ReadTimeBudget {0}.  Restoring detail to {1}.'
+                          .format(self.read_budget.budget, detail_levels[next_level]))
+
+    def report_overflow(self):
+        '''Logs when reads start and stop summing contexts beyond MaxContexts into the overflow context.'''
+        overflow = self.kong_state.overflow_contexts
+        if overflow and not self.overflowing:
+            collectd.warning('Status response has {0} contexts exceeding MaxContexts {1}.  Summing {2} into a '
+                             'context without resource dimensions.'.format(self.kong_state.context_count,
+                                                                           self.kong_state.max_contexts, overflow))
+        elif self.overflowing and not overflow:
+            collectd.info('Status response contexts within MaxContexts {0}.'.format(self.kong_state.max_contexts))
+        self.overflowing = bool(overflow)
+
+    def start_streaming(self):
+        '''Readies the StreamingAggregator for a read when StreamingAggregation is set.'''
+        if not self.config.streaming_aggregation:
+            self.streaming = None
+            return
+        if self.streaming is None:
+            from kong.streaming import StreamingAggregator
+            self.streaming = StreamingAggregator()
+        self.streaming.start(self.config)
+
+    def update_and_report_metrics(self):
+        t0 = time.time()
+        self.start_streaming()
+        self.dimension_sets.rotate()
+        try:
+            self.kong_state = self.fetch_kong_state()
+        except Exception as e:
+            if self.telemetry:
+                self.telemetry.fetch_errors += 1
+                if isinstance(e, ResponseTooLarge):
+                    self.telemetry.oversize_responses += 1
+                self.telemetry.emit()
+            if self.introspection:
+                self.introspection.failed(e)
+            raise
+        self.report_overflow()
+        if self.config.sample_interval:
+            self.add_gauge_samples(self.kong_state)
         t1 = time.time()
-        self.update_http_method_scope_groups()
+        group_sums = None
+        if self.streaming:
+            group_sums = self.update_streamed_groups()
+        else:
+            self.update_http_method_scope_groups()
         t2 = time.time()
+        if self.aggregator:
+            group_sums = self.aggregator.aggregate(self.http_method_scoped_groups, self.kong_state.encoded_metrics)
+        elif group_sums is None and self.config.rollups:  # Summed once for the groups and every rollup
+            group_sums = self.sum_http_method_scoped_groups()
         metrics = []
+        counters = []  # (metric, Metrics, status code scoped) for derivation and raw counter screening
         http_metrics = ['request_latency', 'kong_latency']
         if not self.config.will_report_status_codes:
-            http_metrics.extend(('response_count', 'upstream_latency', 'request_size', 'response_size'))
+            http_metrics.extend(status_code_metrics)
         for http_metric in http_metrics:
             if getattr(self.config, http_metric):
                 if self.config.verbose:
                     collectd.info('Aggregating {0}'.format(http_metric))
-                metrics.extend(self.calculate_http_method_scope_metrics(http_metric))
+                counters.append((http_metric, self.calculate_http_method_scope_metrics(http_metric, group_sums),
+                                 False))
         t3 = time.time()
         status_metrics = []
         if self.config.will_report_status_codes:
-            status_metrics.extend(('response_count', 'upstream_latency', 'request_size', 'response_size'))
+            status_metrics.extend(status_code_metrics)
         for status_metric in status_metrics:
             if getattr(self.config, status_metric):
                 if self.config.verbose:
                     collectd.info('Aggregating {0}'.format(status_metric))
-                metrics.extend(self.calculate_status_code_scope_metrics(status_metric))
+                counters.append((status_metric, self.calculate_status_code_scope_metrics(status_metric, group_sums),
+                                 True))
+        if self.config.rollups:
+            counters.extend(self.calculate_rollup_metrics(group_sums))
         t4 = time.time()
-        server_metrics = ['connections_handled', 'connections_accepted', 'connections_waiting', 'connections_active',
-                          'connections_reading', 'connections_writing', 'total_requests']
-        for server_metric in server_metrics:
-            if getattr(self.config, server_metric):
-                metrics.append(self.calculate_server_metrics(server_metric))
-        database_metrics = ['database_reachable']
-        for database_metric in database_metrics:
-            if getattr(self.config, database_metric):
-                metrics.append(self.calculate_database_metrics(database_metric))
+        if not self.shard:  # Instance metrics are reported by the first of ReadShards shards
+            server_metrics = ['connections_handled', 'connections_accepted', 'connections_waiting',
+                              'connections_active', 'connections_reading', 'connections_writing', 'total_requests']
+            for server_metric in server_metrics:
+                if getattr(self.config, server_metric):
+                    server_metric_value = self.calculate_server_metrics(server_metric)
+                    if self.config.metrics[server_metric][1] == 'counter':
+                        counters.append((server_metric, [server_metric_value], False))
+                    else:
+                        metrics.append(server_metric_value)
+            database_metrics = ['database_reachable']
+            for database_metric in database_metrics:
+                if getattr(self.config, database_metric):
+                    metrics.append(self.calculate_database_metrics(database_metric))
+            if self.config.sample_interval:
+                metrics.extend(self.calculate_sampled_gauge_metrics())
+            if self.read_budget:
+                metrics.append(self.calculate_detail_level_metric())
+        if self.config.emit_raw_counters and self.config.multi_value_dispatch:
+            from kong.multivalue import combine_traffic_counters
+            metrics.extend(combine_traffic_counters(counters, self.config.host))
+        elif self.config.emit_raw_counters:
+            for _, counter_metrics, _ in counters:
+                metrics.extend(counter_metrics)
+        if self.config.derive_metrics:
+            metrics.extend(self.calculate_derived_metrics(counters))
         self.emit_metrics(metrics)
         t5 = time.time()
         if self.config.verbose:
             collectd.info('Fetch/Index: {0}, HTTP Method Scope: {1}, Process HTTP: {2}, '
                           'Process Status: {3}, Emit: {4}, Total: {5}'.format(t1 - t0, t2 - t1, t3 - t2,
                                                                               t4 - t3, t5 - t4, t5 - t0))
+        self.stage_timings = dict(fetch_index=t1 - t0, http_method_scope=t2 - t1, process_http=t3 - t2,
+                                  process_status=t4 - t3, emit=t5 - t4, total=t5 - t0)
+        self.stage_timings.update(self.kong_state.timings)
+        if (self.config.snapshot_file and self.group_plan_key and
+                time.time() - self.snapshot_written_at >= self.config.snapshot_interval):
+            self.write_snapshot()
+        if self.telemetry:
+            self.emit_telemetry(len(metrics))
+        if self.introspection:
+            self.publish_introspection(len(metrics))
+
+    def write_snapshot(self):
+        from kong.snapshot import write_snapshot
+        self.snapshot_written_at = time.time()
+        try:
+            write_snapshot(self.config.snapshot_file, self.group_plan_key[0], self.group_plan_key[1],
+                           self.http_method_scoped_groups)
+        except EnvironmentError as e:
+            collectd.warning('Unable to write snapshot {0}: {1}'.format(self.config.snapshot_file, e))
+
+    def emit_telemetry(self, datapoints):
+        telemetry = self.telemetry
+        for stage, duration in self.stage_timings.items():
+            telemetry.record('stage.{0}.duration'.format(stage), duration)
+        telemetry.record('payload.bytes', self.kong_state.payload_bytes)
+        telemetry.record('contexts', self.kong_state.context_count)
+        if self.kong_state.max_contexts:
+            telemetry.record('overflow_contexts', self.kong_state.overflow_contexts)
+        telemetry.record('groups', len(self.http_method_scoped_groups))
+        telemetry.record('datapoints', datapoints)
+        telemetry.record_hit_ratio('decoded_contexts', self.kong_state.context_cache_hits,
+                                   self.kong_state.context_cache_misses)
+        pattern_lists = [getattr(self.config, pl) for pl, _ in self.config.descriptors.values() if 'list' in pl]
+        cache_lookups = dict(pattern_lists=(sum(pl.cache_hits for pl in pattern_lists),
+                                            sum(pl.cache_misses for pl in pattern_lists)),
+                             group_plan=(self.group_plan_hits, self.group_plan_misses))
+        for cache, (hits, misses) in cache_lookups.items():
+            previous_hits, previous_misses = self.cache_lookups.get(cache, (0, 0))
+            telemetry.record_hit_ratio(cache, hits - previous_hits, misses - previous_misses)
+        self.cache_lookups = cache_lookups
+        telemetry.emit()
+
+    def publish_introspection(self, datapoints):
+        '''Publishes the read's state for the introspection endpoint.  Only counts are gathered here, with
+        histograms and group sizes computed when requested.
+        '''
+        kong_state = self.kong_state
+        patterns = {}
+        for directive, (attr, _) in self.config.descriptors.items():
+            pattern_list = getattr(self.config, attr) if 'list' in attr else None
+            if pattern_list is not None and pattern_list.elements:
+                patterns[directive] = dict(cache_hits=pattern_list.cache_hits, cache_misses=pattern_list.cache_misses,
+                                           cached=len(pattern_list.match_cache) + len(pattern_list.miss_cache),
+                                           matches=dict(zip(pattern_list.elements, pattern_list.pattern_matches)))
+        state = dict(time=time.time(), datapoints=datapoints, payload_bytes=kong_state.payload_bytes,
+                     json_backend=kong_state.json_backend, contexts=kong_state.context_count,
+                     overflow_contexts=kong_state.overflow_contexts, cached_contexts=len(self.decoded_contexts),
+                     context_cache=dict(hits=kong_state.context_cache_hits, misses=kong_state.context_cache_misses),
+                     group_plan=dict(groups=len(self.http_method_scoped_groups), hits=self.group_plan_hits,
+                                     misses=self.group_plan_misses),
+                     detail_level=self.read_budget.level if self.read_budget else 0, patterns=patterns)
+        self.introspection.publish(state, dict(self.stage_timings), self.http_method_scoped_groups)
 
     def update_http_method_scope_groups(self):
-        grouper = Grouper(self.kong_state, self.config)
-        self.http_method_scoped_groups = grouper.get_http_method_scoped_groups()
+        '''Forms groups and their reported dimensions, reusing the current group plan if it was formed
+        from the same Config and set of contexts.
+        '''
+        group_plan_key = (self.config.fingerprint(), frozenset(self.kong_state.resource_metrics))
+        if group_plan_key == self.group_plan_key:
+            self.group_plan_hits += 1
+            return
+        self.group_plan_misses += 1
+        if self.shared_plan:
+            self.http_method_scoped_groups, self.http_method_scoped_dimensions = self.shared_plan.shard(
+                group_plan_key, self.form_groups, self.shard)
+        else:
+            self.http_method_scoped_groups, self.http_method_scoped_dimensions = self.form_groups(group_plan_key)
+        self.group_plan_key = group_plan_key
 
-    def calculate_http_method_scope_metrics(self, metric):
-        type_instance, metric_type = self.config.metrics[metric][:2]
-        metrics = []
+    def form_groups(self, group_plan_key):
+        '''Returns the groups of the current KongState and their reported dimensions.'''
+        if self.group_plan_key is None and self.snapshot_plan_matches(group_plan_key):  # Warm start
+            groups = self.snapshot.groups()
+        else:
+            groups = Grouper(self.kong_state, self.config).get_http_method_scoped_groups()
+        return groups, [self.dimensions_from_http_method_group(group) for group in groups]
+
+    def update_streamed_groups(self):
+        '''Forms groups and their reported dimensions from the StreamingAggregator's dimension keys, returning
+        their sums.
+        '''
+        keys = list(self.streaming.groups)
+        self.http_method_scoped_groups = keys
+        self.http_method_scoped_dimensions = []
+        for key in keys:
+            dimensions = self.config.extra_dimensions.copy()
+            dimensions.update(key)
+            self.http_method_scoped_dimensions.append(self.dimension_sets.get(dimensions))
+        return [self.streaming.groups[key] for key in keys]
+
+    def snapshot_plan_matches(self, group_plan_key):
+        snapshot = self.snapshot
+        return bool(snapshot and snapshot.fingerprint == group_plan_key[0] and
+                    len(snapshot) == len(group_plan_key[1]) and snapshot.plan_contexts() == group_plan_key[1])
+
+    def sum_http_method_scoped_groups(self):
+        '''Returns a ({metric: sum}, {status code: {metric: sum}}) pair for each group from decoded resource
+        metrics.
+        '''
+        group_sums = []
         for group in self.http_method_scoped_groups:
-            metric_value = 0
+            sums = ({}, {})
             for ctx_hash in group:
-                metric_value += self.kong_state.resource_metrics[ctx_hash][metric]
+                resource_metrics = self.kong_state.resource_metrics[ctx_hash]
+                merge_group_sums(sums, dict([(m, resource_metrics[m]) for m in metric_tokens[1]]),
+                                 resource_metrics['status_codes'])
+            group_sums.append(sums)
+        return group_sums
+
+    def rollup_group_sums(self, group_sums):
+        '''Returns (level, level dimensions, dimensions, group sums) of each RollupLevels level.  Each level's groups
+        are summed from those of the smallest finer level already formed, never from contexts.
+        '''
+        extra_dimensions = self.config.extra_dimensions
+        formed = [(None, self.http_method_scoped_dimensions, group_sums)]  # Finest groups have every dimension
+        rollups = []
+        for level, level_dimensions in self.config.rollups:
+            finer = [f for f in formed if f[0] is None or set(level_dimensions) <= set(f[0])]
+            _, source_dimensions, source_sums = min(finer, key=lambda f: len(f[1]))
+            positions = {}
+            dimensions, sums = [], []
+            for group_dimensions, (metric_sums, status_sums) in zip(source_dimensions, source_sums):
+                rolled_up = dict([(d, v) for d, v in group_dimensions.items()
+                                  if d in level_dimensions or d in extra_dimensions])
+                rolled_up['rollup'] = level
+                key = frozenset(rolled_up.items())
+                position = positions.get(key)
+                if position is None:
+                    position = positions[key] = len(dimensions)
+                    dimensions.append(self.dimension_sets.get(rolled_up))
+                    sums.append(({}, {}))
+                merge_group_sums(sums[position], metric_sums, status_sums)
+            formed.append((level_dimensions, dimensions, sums))
+            rollups.append((level, level_dimensions, dimensions, sums))
+        return rollups
 
-            dimensions = self.dimensions_from_http_method_group(group)
-            metric_args, metric_kwargs = self.metric_args(type_instance, metric_type, metric_value, dimensions)
-            metrics.append(Metric(*metric_args, **metric_kwargs))
+    def calculate_rollup_metrics(self, group_sums):
+        '''Returns (metric, Metrics, status code scoped) counters for each RollupLevels level.  Status code
+        scoped metrics are only scoped by status code at levels including status_code.
+        '''
+        counters = []
+        for level, level_dimensions, dimensions, sums in self.rollup_group_sums(group_sums):
+            status_scoped = self.config.will_report_status_codes and 'status_code' in level_dimensions
+            for metric in ('request_latency', 'kong_latency', 'response_count', 'upstream_latency', 'request_size',
+                           'response_size'):
+                if not getattr(self.config, metric):
+                    continue
+                if status_scoped and metric in status_code_metrics:
+                    counters.append((metric, self.calculate_status_code_scope_metrics(metric, sums, dimensions),
+                                     True))
+                else:
+                    counters.append((metric, self.calculate_http_method_scope_metrics(metric, sums, dimensions),
+                                     False))
+        return counters
+
+    def calculate_http_method_scope_metrics(self, metric, group_sums=None, dimensions=None):
+        '''Builds a Metric for each group, summing its members' values unless ShardedAggregator,
+        StreamingAggregator, or rollup group_sums are provided.  dimensions default to those of the groups.
+        '''
+        type_instance, metric_type = self.config.metrics[metric][:2]
+        metrics = []
+        if dimensions is None:
+            dimensions = self.http_method_scoped_dimensions
+        for i, group_dimensions in enumerate(dimensions):
+            if group_sums is not None:
+                metric_value = group_sums[i][0].get(metric, 0)
+            else:
+                metric_value = 0
+                for ctx_hash in self.http_method_scoped_groups[i]:
+                    metric_value += self.kong_state.resource_metrics[ctx_hash][metric]
+
+            metric_args, metric_kwargs = self.metric_args(type_instance, metric_type, metric_value,
+                                                          group_dimensions)
+            metrics.append(self.metric_class(*metric_args, **metric_kwargs))
         return metrics
 
-    def calculate_status_code_scope_metrics(self, metric):
+    def calculate_status_code_scope_metrics(self, metric, group_sums=None, dimensions=None):
         type_instance, metric_type = self.config.metrics[metric][:2]
         metrics = []
+        if dimensions is None:
+            dimensions = self.http_method_scoped_dimensions
 
         def value_dict():
             return defaultdict(int)
 
-        for http_group in self.http_method_scoped_groups:
+        for i, group_dimensions in enumerate(dimensions):
             status_metric_values = defaultdict(value_dict)
-            for ctx_hash in http_group:
-                status_codes = self.kong_state.resource_metrics[ctx_hash]['status_codes']
+            if group_sums is not None:  # Member status codes already summed
+                member_status_codes = [group_sums[i][1]]
+            else:
+                member_status_codes = [self.kong_state.resource_metrics[ctx_hash]['status_codes']
+                                       for ctx_hash in self.http_method_scoped_groups[i]]
+            for status_codes in member_status_codes:
                 hits, misses = self.filter_status_codes_by_pattern_lists(status_codes)
                 for status_code, metric_values in status_codes.items():
                     if self.config.report_status_code_groups and status_code not in hits:
-                        status_code = '{0}xx'.format(status_code[0])
+                        status_code = intern_value('{0}xx'.format(status_code[0]))
                     elif status_code in misses:
                         status_code = 'miss'
                     for m, v in metric_values.items():
                         status_metric_values[status_code][m] += v
 
-            dimensions = self.dimensions_from_http_method_group(http_group)
             for status_code in status_metric_values:
-                dimensions = dimensions.copy()
-                if status_code == 'miss':
-                    dimensions.pop('status_code', None)
-                else:
-                    dimensions['status_code'] = status_code
+                sc_dimensions = self.dimension_sets.updated(group_dimensions, 'status_code',
+                                                            None if status_code == 'miss' else status_code)
                 metric_value = status_metric_values[status_code][metric]
-                metric_args, metric_kwargs = self.metric_args(type_instance, metric_type, metric_value, dimensions)
-                metrics.append(Metric(*metric_args, **metric_kwargs))
+                metric_args, metric_kwargs = self.metric_args(type_instance, metric_type, metric_value,
+                                                              sc_dimensions)
+                metrics.append(self.metric_class(*metric_args, **metric_kwargs))
 
         return metrics
 
@@ -172,7 +603,7 @@ class Reporter(object):
                     if hit:
                         dimensions[dimension] = value
 
-        return dimensions
+        return self.dimension_sets.get(dimensions)
 
     def metric_args(self, type_instance, metric_type, metric_value, dimensions):
         metric_args = (type_instance, metric_type, metric_value)
@@ -181,6 +612,33 @@ class Reporter(object):
             metric_kwargs['host'] = self.config.host
         return metric_args, metric_kwargs
 
+    def calculate_derived_metrics(self, counters):
+        metrics = []
+        for type_instance, metric_value, dimensions in self.derived_metrics.derive(counters, self.config.metrics):
+            metric_args, metric_kwargs = self.metric_args(type_instance, 'gauge', metric_value, dimensions)
+            metrics.append(self.metric_class(*metric_args, **metric_kwargs))
+        return metrics
+
+    def calculate_sampled_gauge_metrics(self):
+        '''Returns min, max, and mean Metrics of each gauge's samples since the last read.  The last sampled value
+        is the current read's, reported by calculate_server_metrics and calculate_database_metrics.
+        '''
+        metrics = []
+        for metric, aggregates in self.gauge_sampler.drain().items():
+            type_instance = self.config.metrics[metric][0]
+            for aggregate in ('min', 'max', 'mean'):
+                metric_args, metric_kwargs = self.metric_args('{0}.{1}'.format(type_instance, aggregate), 'gauge',
+                                                              aggregates[aggregate],
+                                                              self.config.extra_dimensions.copy())
+                metrics.append(self.metric_class(*metric_args, **metric_kwargs))
+        return metrics
+
+    def calculate_detail_level_metric(self):
+        '''Reports the ReadTimeBudget detail level index of the current read (0 is full detail).'''
+        metric_args, metric_kwargs = self.metric_args('kong.plugin.detail_level', 'gauge', self.read_budget.level,
+                                                      self.config.extra_dimensions.copy())
+        return self.metric_class(*metric_args, **metric_kwargs)
+
     def calculate_server_metrics(self, metric):
         return self.calculate_flat_metrics(self.kong_state.server_metrics, metric)
 
@@ -192,7 +650,7 @@ class Reporter(object):
         metric_value = metric_store[metric]
         type_instance, metric_type = self.config.metrics[metric][:2]
         metric_args, metric_kwargs = self.metric_args(type_instance, metric_type, metric_value, dimensions)
-        return Metric(*metric_args, **metric_kwargs)
+        return self.metric_class(*metric_args, **metric_kwargs)
 
     def emit_metrics(self, metrics):
         if self.config.verbose:
@@ -0,0 +1,39 @@
+from __future__ import absolute_import
+import threading
+
+
+class GaugeSampler(object):
+    '''Accumulates min/max/mean/last aggregates of instantaneous gauge values sampled between reads.
+    Samples are added from a separate collectd read callback so all access is serialized.
+
+    gs = GaugeSampler()
+    gs.add(dict(connections_active=10))
+    gs.add(dict(connections_active=20))
+    gs.drain() == dict(connections_active=dict(min=10, max=20, mean=15.0, last=20))
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.aggregates = {}  # gauge -> [min, max, sum, count, last]
+
+    def add(self, values):
+        with self.lock:
+            for gauge, value in values.items():
+                aggregate = self.aggregates.get(gauge)
+                if aggregate is None:
+                    self.aggregates[gauge] = [value, value, value, 1, value]
+                    continue
+                aggregate[0] = min(aggregate[0], value)
+                aggregate[1] = max(aggregate[1], value)
+                aggregate[2] += value
+                aggregate[3] += 1
+                aggregate[4] = value
+
+    def drain(self):
+        '''Returns the aggregates of all samples since the previous drain and starts a new sampling window.'''
+        with self.lock:
+            aggregates, self.aggregates = self.aggregates, {}
+        drained = {}
+        for gauge, (minimum, maximum, total, count, last) in aggregates.items():
+            drained[gauge] = dict(min=minimum, max=maximum, mean=float(total) / count, last=last)
+        return drained
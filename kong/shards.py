@@ -0,0 +1,46 @@
+from __future__ import absolute_import
+import heapq
+import threading
+
+
+def partition(groups, shards):
+    '''Returns the indices of groups assigned to each of shards, balancing their members.  Each group, largest
+    first, is assigned to the shard with the fewest members so far.  A group also counts as a member for the cost
+    of emitting its Metrics.
+    '''
+    assigned = [[] for _ in range(shards)]
+    heap = [(0, shard) for shard in range(shards)]
+    for size, index in sorted([(len(group) + 1, i) for i, group in enumerate(groups)], reverse=True):
+        members, shard = heapq.heappop(heap)
+        assigned[shard].append(index)
+        heapq.heappush(heap, (members + size, shard))
+    for indices in assigned:
+        indices.sort()
+    return assigned
+
+
+class SharedPlan(object):
+    '''A group plan formed once and split between the Reporters of ReadShards read callbacks, each reporting its
+    own shard of the groups.
+
+    sp = SharedPlan(4)
+    groups, dimensions = sp.shard(group_plan_key, reporter.form_groups, 2)
+    '''
+
+    def __init__(self, shards):
+        self.shards = shards
+        self.lock = threading.Lock()
+        self.key = None
+        self.groups = []
+        self.dimensions = []
+        self.assigned = [[] for _ in range(shards)]
+
+    def shard(self, key, form_groups, shard):
+        '''Returns the groups and dimensions of shard, forming the plan with form_groups(key) if key is new.'''
+        with self.lock:
+            if key != self.key:
+                self.groups, self.dimensions = form_groups(key)
+                self.assigned = partition(self.groups, self.shards)
+                self.key = key
+            groups, dimensions, indices = self.groups, self.dimensions, self.assigned[shard]
+        return [groups[i] for i in indices], [dimensions[i] for i in indices]
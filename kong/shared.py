@@ -0,0 +1,57 @@
+from __future__ import absolute_import
+import threading
+import time
+
+
+default_window = 10  # collectd's default Interval, used for blocks inheriting it
+reuse_fraction = .5  # Portion of the window within which a completed fetch is reused
+
+
+class SharedFetch(object):
+    '''A KongState fetched and decoded once per window and shared by the Reporters of every Module block polling
+    the same URL with the same credentials.  Reporters only read the shared state, each forming its own groups
+    and Metrics from it.
+
+    A fetch completed within half of the shortest Interval of its sharers is reused, so blocks with longer
+    intervals read state no older than that, and concurrent reads of blocks with the same interval wait on a
+    single request.
+
+    sf = shared_fetch(fetch_key, interval)
+    kong_state = sf.kong_state(reporter.new_kong_state)
+    '''
+
+    def __init__(self, window=default_window):
+        self.window = window
+        self.lock = threading.Lock()
+        self.decoded_contexts = {}  # Shared by all sharers' KongStates
+        self.state = None
+        self.fetched_at = None
+        self.fetches = 0
+        self.reuses = 0
+
+    def kong_state(self, new_kong_state):
+        '''Returns the current shared KongState, updating a new one from new_kong_state() if it is stale.'''
+        with self.lock:
+            if self.state is not None and time.time() - self.fetched_at < self.window * reuse_fraction:
+                self.reuses += 1
+                return self.state
+            kong_state = new_kong_state()
+            kong_state.update_from_sfx()
+            self.state, self.fetched_at = kong_state, time.time()
+            self.fetches += 1
+            return kong_state
+
+
+shared_fetches = {}  # Fetch key to SharedFetch
+shared_fetches_lock = threading.Lock()
+
+
+def shared_fetch(key, interval=None):
+    '''Returns the SharedFetch for key, narrowing its window to interval if shorter.'''
+    window = interval or default_window
+    with shared_fetches_lock:
+        if key not in shared_fetches:
+            shared_fetches[key] = SharedFetch(window)
+        fetch = shared_fetches[key]
+        fetch.window = min(fetch.window, window)
+        return fetch
@@ -0,0 +1,104 @@
+from __future__ import absolute_import
+from binascii import hexlify, unhexlify
+import mmap
+import os
+import struct
+
+import collectd
+
+
+magic = b'KONGSNAP'
+version = 2
+header = struct.Struct('<8sI32sII')  # magic, version, Config fingerprint, plan contexts, groups
+digest_size = 16  # md5 context hash
+offset = struct.Struct('<Q')
+index = struct.Struct('<I')
+
+
+class Snapshot(object):
+    '''A memory-mapped snapshot of the group plan of a previous process, read lazily so loading it at configuration
+    costs no parsing.  The plan is stored as the md5 context hashes it was formed from, and its groups as indices
+    into them.
+
+    Layout (little-endian):
+
+    header
+    plan context hashes
+    group member offsets (groups + 1), as indices into the member array
+    group member context indices
+
+    s = Snapshot('/var/lib/collectd/kong.snapshot')
+    if s.plan_contexts() == frozenset(kong_state.resource_metrics):
+        groups = s.groups()
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        file_magic, file_version, fingerprint, self.contexts, self.groups_count = header.unpack_from(self.buffer, 0)
+        if file_magic != magic or file_version != version:
+            raise ValueError('{0} is not a version {1} Kong snapshot.'.format(path, version))
+        self.fingerprint = fingerprint.decode('ascii')
+        self.hashes_pos = header.size
+        self.group_offsets_pos = self.hashes_pos + digest_size * self.contexts
+        self.members_pos = self.group_offsets_pos + offset.size * (self.groups_count + 1)
+        self.hashes = None
+
+    def __len__(self):
+        return self.contexts
+
+    def context_hashes(self):
+        if self.hashes is None:
+            data = self.buffer[self.hashes_pos:self.group_offsets_pos]
+            self.hashes = [hexlify(data[i:i + digest_size]).decode('ascii')
+                           for i in range(0, len(data), digest_size)]
+        return self.hashes
+
+    def plan_contexts(self):
+        '''Returns the frozenset of context hashes the group plan was formed from.'''
+        return frozenset(self.context_hashes())
+
+    def groups(self):
+        '''Returns the group plan's groups as sets of context hashes.'''
+        hashes = self.context_hashes()
+        offsets = struct.unpack_from('<{0}Q'.format(self.groups_count + 1), self.buffer, self.group_offsets_pos)
+        groups = []
+        for start, end in zip(offsets, offsets[1:]):
+            members = struct.unpack_from('<{0}I'.format(end - start), self.buffer,
+                                         self.members_pos + index.size * start)
+            groups.append(set([hashes[i] for i in members]))
+        return groups
+
+    def close(self):
+        self.buffer.close()
+
+
+def load_snapshot(path):
+    '''Returns the Snapshot at path, or None if there is none or it can't be read.'''
+    if not os.path.exists(path):
+        return None
+    try:
+        return Snapshot(path)
+    except (EnvironmentError, ValueError, struct.error) as e:
+        collectd.warning('Ignoring unreadable snapshot {0}: {1}'.format(path, e))
+        return None
+
+
+def write_snapshot(path, fingerprint, plan_contexts, groups):
+    '''Atomically writes the group plan formed from the plan_contexts hashes to path.'''
+    hashes = list(plan_contexts)
+    positions = dict([(h, i) for i, h in enumerate(hashes)])
+    group_offsets, members = [0], []
+    for group in groups:
+        members.extend([positions[h] for h in group])
+        group_offsets.append(len(members))
+
+    parts = [header.pack(magic, version, fingerprint.encode('ascii'), len(hashes), len(group_offsets) - 1)]
+    parts.extend([unhexlify(h) for h in hashes])
+    parts.append(struct.pack('<{0}Q'.format(len(group_offsets)), *group_offsets))
+    parts.append(struct.pack('<{0}I'.format(len(members)), *members))
+
+    with open(path + '.tmp', 'wb') as f:
+        f.write(b''.join(parts))
+    os.rename(path + '.tmp', path)
@@ -0,0 +1,61 @@
+from __future__ import absolute_import
+
+from kong.kong_state import fold_resource_metrics
+from kong.utils import filter_by_pattern_lists
+
+
+dimension_types = ('api_id', 'api_name', 'service_id', 'service_name', 'route_id', 'http_method')
+key_cache_limit = 100000  # Cached dimension keys before the cache is cleared
+
+
+class StreamingAggregator(object):
+    '''Folds each context's resource metrics into per-group sums while KongState parses the status response, so a
+    read holds state for its groups rather than its contexts.  A context's group is keyed by its dimension values
+    Config will report, as Reporter.dimensions_from_http_method_group determines them for Grouper's groups.
+    Contexts with the same reported dimensions share a group.
+
+    sa = StreamingAggregator()
+    sa.start(config)
+    kong_state = KongState(..., streaming=sa)
+    kong_state.update_from_sfx()
+    for dimension_key, (metric_sums, status_code_sums) in sa.groups.items():
+    '''
+
+    def __init__(self):
+        self.config = None
+        self.fingerprint = None
+        self.dimensions = ()
+        self.keys = {}  # Dimension values of contexts to their dimension key under the current Config
+        self.groups = {}  # Dimension key to ({metric: sum}, {status code: {metric: sum}}) of the current read
+
+    def start(self, config):
+        '''Resets group sums for a read with config.'''
+        fingerprint = config.fingerprint()
+        if fingerprint != self.fingerprint or len(self.keys) > key_cache_limit:
+            self.keys = {}
+        self.config, self.fingerprint = config, fingerprint
+        self.dimensions = [d for d in dimension_types if getattr(config, 'will_report_{0}s'.format(d))]
+        self.groups = {}
+
+    def dimension_key(self, decoded_context):
+        '''Returns the sorted (dimension, value) pairs of decoded_context that will be reported.'''
+        values = tuple([decoded_context[dimension] for dimension in self.dimensions])
+        key = self.keys.get(values)
+        if key is None:
+            key = []
+            for dimension, value in zip(self.dimensions, values):
+                if value is None:
+                    continue
+                hit, _ = filter_by_pattern_lists((value,), getattr(self.config, '{0}s_whitelist'.format(dimension)),
+                                                 getattr(self.config, '{0}s_blacklist'.format(dimension)))
+                if hit:
+                    key.append((dimension, value))
+            key = self.keys[values] = tuple(sorted(key))
+        return key
+
+    def fold(self, decoded_context, encoded_metrics):
+        key = self.dimension_key(decoded_context)
+        sums = self.groups.get(key)
+        if sums is None:
+            sums = self.groups[key] = ({}, {})
+        fold_resource_metrics(encoded_metrics, sums[0], sums[1])
@@ -0,0 +1,97 @@
+from __future__ import absolute_import
+import random
+import uuid
+
+
+method_choices = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS', 'CONNECT', 'TRACE')
+status_code_choices = ('200', '201', '204', '301', '302', '304', '400', '401', '403', '404', '409', '429', '500',
+                       '502', '503', '504')
+
+
+class SyntheticStatus(object):
+    '''Generates kong-plugin-signalfx /signalfx status views of configurable shape for benchmarks and tests.
+
+    Each API and each Service Route has a context per HTTP method, and each HTTP method has an additional
+    unscoped context (health checks, etc.).  Each context has status_codes status code entries.  Counter values
+    grow with every snapshot, and a churn fraction of APIs and Services are renamed or recreated with new IDs
+    between snapshots.
+
+    ss = SyntheticStatus(services=100, routes_per_service=10, http_methods=4)
+    ss.contexts == 4004
+    status = ss.snapshot()
+    '''
+
+    def __init__(self, apis=0, services=10, routes_per_service=1, http_methods=2, status_codes=4, churn=0.0,
+                 seed=0):
+        self.random = random.Random(seed)
+        self.http_methods = method_choices[:http_methods]
+        self.status_codes = status_code_choices[:status_codes]
+        self.routes_per_service = routes_per_service
+        self.churn = churn
+        self.generation = 0
+        self.apis = [[self.uuid(), 'api_{0}'.format(i)] for i in range(apis)]
+        self.services = [[self.uuid(), 'service_{0}'.format(i), [self.uuid() for _ in range(routes_per_service)]]
+                         for i in range(services)]
+
+    @property
+    def contexts(self):
+        return (len(self.apis) + len(self.services) * self.routes_per_service + 1) * len(self.http_methods)
+
+    @classmethod
+    def with_contexts(cls, contexts, http_methods=4, routes_per_service=10, **kwargs):
+        '''Returns a SyntheticStatus of Service Routes with approximately the desired number of contexts.'''
+        services = max(1, int(round(float(contexts) / http_methods / routes_per_service)))
+        return cls(services=services, routes_per_service=routes_per_service, http_methods=http_methods, **kwargs)
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    def apply_churn(self):
+        for resources in (self.apis, self.services):
+            for resource in self.random.sample(resources, int(round(self.churn * len(resources)))):
+                if self.random.random() < .5:
+                    resource[0] = self.uuid()
+                else:
+                    resource[1] = '{0}_g{1}'.format(resource[1].split('_g')[0], self.generation)
+
+    def resource_contexts(self):
+        for api_id, api_name in self.apis:
+            yield (api_id, api_name, '\x00', '\x00', '\x00')
+        for service_id, service_name, route_ids in self.services:
+            for route_id in route_ids:
+                yield ('\x00', '\x00', service_id, service_name, route_id)
+        yield ('\x00', '\x00', '\x00', '\x00', '\x00')
+
+    def encode_metrics(self, index):
+        response_count = request_latency = upstream_latency = request_size = response_size = 0
+        statuses = []
+        for sc_index, status_code in enumerate(self.status_codes):
+            weight = ((index + sc_index) % 7 + 1) * self.generation
+            count, upstream, req_size, resp_size = weight, weight * 11, weight * 230, weight * 1500
+            response_count += count
+            upstream_latency += upstream
+            request_size += req_size
+            response_size += resp_size
+            request_latency += upstream + weight * 3
+            statuses.append('{0}:{1}:{2}:{3}:{4}'.format(status_code, count, upstream, req_size, resp_size))
+        kong_latency = request_latency - upstream_latency
+        return ','.join(['{0},{1},{2},{3},{4},{5}'.format(response_count, request_latency, kong_latency,
+                                                          upstream_latency, request_size, response_size)] + statuses)
+
+    def snapshot(self):
+        '''Returns the next status view as parsed JSON, advancing counters and applying churn.'''
+        self.generation += 1
+        if self.generation > 1 and self.churn:
+            self.apply_churn()
+        signalfx = {}
+        index = 0
+        for resource_context in self.resource_contexts():
+            for http_method in self.http_methods:
+                context = '\x1f'.join(('1',) + resource_context + (http_method,))
+                signalfx[context] = self.encode_metrics(index)
+                index += 1
+        requests = self.generation * index
+        server = dict(connections_handled=requests, connections_accepted=requests, connections_waiting=index % 13,
+                      connections_active=index % 17, connections_reading=index % 3, connections_writing=index % 5,
+                      total_requests=requests)
+        return dict(signalfx=signalfx, server=server, database=dict(reachable=True))
@@ -0,0 +1,44 @@
+from __future__ import absolute_import
+
+import collectd
+
+
+class Telemetry(object):
+    '''Records the plugin's own per-read processing statistics and dispatches them as collectd values
+    distinguished from Kong metrics by a dedicated plugin_instance.
+
+    'stage.<stage>.duration': seconds spent in each read stage
+    'payload.bytes', 'contexts', 'groups', 'datapoints': per-read sizes
+    '<cache>.hit_ratio': per-read hit ratio of decoded_contexts, PatternList, and group plan caches
+    'fetch_errors': cumulative count of failed status fetches
+    'oversize_responses': cumulative count of status responses aborted for exceeding MaxResponseBytes
+    '''
+
+    plugin_instance = 'telemetry'
+
+    def __init__(self, host=None):
+        self.host = host
+        self.gauges = {}
+        self.fetch_errors = 0
+        self.oversize_responses = 0
+
+    def record(self, name, value):
+        self.gauges[name] = value
+
+    def record_hit_ratio(self, name, hits, misses):
+        if hits + misses:
+            self.record('{0}.hit_ratio'.format(name), float(hits) / (hits + misses))
+
+    def emit(self):
+        gauges, self.gauges = self.gauges, {}
+        for name, value in gauges.items():
+            self.dispatch(name, 'gauge', value)
+        self.dispatch('fetch_errors', 'counter', self.fetch_errors)
+        self.dispatch('oversize_responses', 'counter', self.oversize_responses)
+
+    def dispatch(self, name, value_type, value):
+        values = collectd.Values(plugin='kong', plugin_instance=self.plugin_instance, type=value_type,
+                                 type_instance='kong.plugin.{0}'.format(name), values=[value])
+        if self.host:
+            values.host = self.host
+        values.dispatch()
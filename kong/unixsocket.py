@@ -0,0 +1,70 @@
+'''A requests transport adapter that sends every request over a Unix domain socket with pooled keep-alive
+connections, avoiding TCP and TLS handshakes to a Kong Admin API listening on a local socket.
+
+session = requests.Session()
+session.mount('http://', UnixSocketAdapter('/usr/local/kong/admin.sock'))
+session.get('http://localhost/signalfx')  # Host is only used for the Host header
+'''
+from __future__ import absolute_import
+import socket
+
+from requests.adapters import HTTPAdapter
+try:  # The urllib3 requests itself uses, whose Timeout it passes to the pool
+    from requests.packages.urllib3.connection import HTTPConnection
+    from requests.packages.urllib3.connectionpool import HTTPConnectionPool
+except ImportError:  # requests without a packages alias
+    from urllib3.connection import HTTPConnection
+    from urllib3.connectionpool import HTTPConnectionPool
+
+from kong.config import socket_host
+
+
+class UnixSocketConnection(HTTPConnection):
+
+    def __init__(self, socket_path, *args, **kwargs):
+        HTTPConnection.__init__(self, *args, **kwargs)
+        self.socket_path = socket_path
+
+    def _new_conn(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if isinstance(self.timeout, (int, float)):
+            sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+
+class UnixSocketConnectionPool(HTTPConnectionPool):
+
+    def __init__(self, socket_path, maxsize=1):
+        HTTPConnectionPool.__init__(self, socket_host, maxsize=maxsize)
+        self.socket_path = socket_path
+
+    def _new_conn(self):
+        self.num_connections += 1
+        return UnixSocketConnection(self.socket_path, self.host, timeout=self.timeout.connect_timeout)
+
+
+class UnixSocketAdapter(HTTPAdapter):
+    '''Sends requests for any mounted URL prefix to socket_path, keeping up to pool_maxsize idle connections.'''
+
+    def __init__(self, socket_path, pool_maxsize=1):
+        HTTPAdapter.__init__(self, pool_connections=1, pool_maxsize=pool_maxsize)
+        self.socket_path = socket_path
+        self.pool = UnixSocketConnectionPool(socket_path, maxsize=pool_maxsize)
+
+    def get_connection(self, url, proxies=None):
+        return self.pool
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        return self.pool
+
+    def request_url(self, request, proxies):
+        return request.path_url
+
+    def close(self):
+        self.pool.close()
+        HTTPAdapter.close(self)
@@ -4,6 +4,11 @@ import re
 from six import text_type
 
 
+cache_limit = 10000  # Maximum cached match results per PatternList before they are reset
+interned_values = {}  # Single shared instance of each distinct dimension value
+interned_value_limit = 1000000  # Maximum interned values before they are reset
+
+
 class PatternList(object):
 
     def __init__(self, *elements):
@@ -11,24 +16,42 @@ class PatternList(object):
         self.patterns = self.to_patterns(elements)
         self.match_cache = set()
         self.miss_cache = set()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.pattern_matches = [0] * len(self.patterns)  # Uncached strings first matched by each pattern
 
     def matches(self, *strings):
         matchset = set()
         matches = []
         for string in strings:
             if string in self.match_cache:
+                self.cache_hits += 1
                 if string not in matchset:
                     matches.append(string)
                     matchset.add(string)
                 continue
             if string in self.miss_cache:
+                self.cache_hits += 1
                 continue
-            for pattern in self.patterns:
-                if string not in matchset and pattern.match(string):
-                    matches.append(string)
-                    matchset.add(string)
+            self.cache_misses += 1
+            if len(self.match_cache) + len(self.miss_cache) >= cache_limit:
+                self.clear_cache()
+            for i, pattern in enumerate(self.patterns):
+                if pattern.match(string):
+                    self.pattern_matches[i] += 1
+                    self.match_cache.add(string)
+                    if string not in matchset:
+                        matches.append(string)
+                        matchset.add(string)
+                    break
+            else:
+                self.miss_cache.add(string)
         return matches
 
+    def clear_cache(self):
+        self.match_cache.clear()
+        self.miss_cache.clear()
+
     def to_patterns(self, elements):
         patternized = []
         for element in elements:
@@ -43,6 +66,8 @@ class PatternList(object):
     def update(self, *elements):
         self.elements.extend(elements)
         self.patterns.extend(self.to_patterns(elements))
+        self.pattern_matches.extend([0] * len(elements))
+        self.clear_cache()
 
     def __str__(self):
         return str(self.elements)
@@ -61,3 +86,74 @@ def filter_by_pattern_lists(attributes, whitelist, blacklist):
         else:
             misses.append(attr)
     return hits, misses
+
+
+def intern_value(value):
+    '''Returns the shared instance of value so each distinct dimension value is held once by decoded contexts,
+    index sets, and emitted dimensions.  Unlike intern(), accepts Python 2 unicode.
+    '''
+    shared = interned_values.get(value)
+    if shared is None:
+        if len(interned_values) >= interned_value_limit:
+            interned_values.clear()
+        shared = interned_values[value] = value
+    return shared
+
+
+class DimensionSets(object):
+    '''Shares a single dimensions dict between all groups and Metrics with the same dimensions.  Shared
+    dimensions must not be modified.  Dimension sets unused for a read are released by the following rotate().
+
+    ds = DimensionSets()
+    dimensions = ds.get(dict(api_name='api', http_method='GET'))
+    status_code_dimensions = ds.updated(dimensions, 'status_code', '200')
+    ds.rotate()
+    '''
+
+    def __init__(self):
+        self.sets = {}  # Dimension items to their shared dimensions
+        self.updates = {}  # (id of shared dimensions, dimension, value) to (shared dimensions, updated dimensions)
+        self.previous_sets = {}  # Those of the previous read
+        self.previous_updates = {}
+
+    def get(self, dimensions):
+        '''Returns the shared dimensions equal to dimensions.'''
+        key = frozenset(dimensions.items())
+        shared = self.sets.get(key)
+        if shared is None:
+            shared = self.sets[key] = self.previous_sets.get(key, dimensions)
+        return shared
+
+    def updated(self, dimensions, dimension, value):
+        '''Returns the shared copy of dimensions with dimension set to value, or without it if value is None.'''
+        update_key = (id(dimensions), dimension, value)
+        cached = self.updates.get(update_key)
+        if cached is None:
+            cached = self.previous_updates.get(update_key)
+        if cached is None:
+            updated = dimensions.copy()
+            if value is None:
+                updated.pop(dimension, None)
+            else:
+                updated[dimension] = intern_value(value)
+            cached = (dimensions, self.get(updated))  # Retaining dimensions guarantees its id isn't reused
+        self.updates[update_key] = cached
+        return cached[1]
+
+    def rotate(self):
+        '''Releases the dimension sets that weren't used since the previous rotate().'''
+        self.previous_sets, self.sets = self.sets, {}
+        self.previous_updates, self.updates = self.updates, {}
+
+
+def merge_sums(merged, sums):
+    for metric, value in sums.items():
+        merged[metric] = merged.get(metric, 0) + value
+
+
+def merge_group_sums(merged, sums, status_sums):
+    '''Adds {metric: sum} sums and {status code: {metric: sum}} status_sums to a merged (sums, status sums) pair.'''
+    merge_sums(merged[0], sums)
+    merged_status_sums = merged[1]
+    for status_code, sc_sums in status_sums.items():
+        merge_sums(merged_status_sums.setdefault(status_code, {}), sc_sums)
@@ -0,0 +1,70 @@
+'''Times decoding synthetic status payloads of increasing size with each importable JSON backend, and with the
+requests Response.json() path KongState previously used, writing machine-readable results.
+
+python test/benchmark/json_backends.py --contexts 1000 10000 100000 --repeat 5
+python test/benchmark/json_backends.py --contexts 100000 --output json_backends.json
+'''
+from __future__ import absolute_import, print_function
+from os.path import abspath, dirname
+import argparse
+import json
+import platform
+import sys
+import time
+
+sys.path.insert(0, dirname(dirname(dirname(abspath(__file__)))))
+
+from kong.jsonbackend import backend_loads, backends, select_backend  # noqa
+from kong.synthetic import SyntheticStatus  # noqa
+
+
+def requests_loads():
+    from requests.models import Response
+
+    def loads(content):
+        r = Response()
+        r._content = content
+        return r.json()
+    return loads
+
+
+def median(values):
+    return sorted(values)[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contexts', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5, help='Decodes per backend and size to take the median of')
+    parser.add_argument('--output', help='JSON results path (default stdout)')
+    args = parser.parse_args()
+
+    decoders = [('requests', requests_loads())]
+    for name in backends:
+        try:
+            decoders.append((name, backend_loads(name)))
+        except ImportError:
+            print('{0} is not installed'.format(name), file=sys.stderr)
+    results = []
+    for contexts in args.contexts:
+        payload = json.dumps(SyntheticStatus.with_contexts(contexts).snapshot()).encode('utf-8')
+        for name, loads in decoders:
+            durations = []
+            for _ in range(args.repeat):
+                t0 = time.time()
+                loads(payload)
+                durations.append(time.time() - t0)
+            results.append(dict(contexts=contexts, payload_bytes=len(payload), backend=name, seconds=median(durations)))
+            print('{0} contexts ({1} bytes), {2}: {3:.2f} ms'.format(
+                contexts, len(payload), name, median(durations) * 1000), file=sys.stderr)
+    output = dict(python=platform.python_version(), platform=platform.platform(), time=time.time(),
+                  selected=select_backend()[0], results=results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(output, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+'''Times and memory-profiles the KongState -> Grouper -> Reporter pipeline with fauxllectd against synthetic status
+views of increasing size, writing machine-readable results for comparison between versions.
+
+python test/benchmark/pipeline.py --contexts 1000 10000 100000 1000000 --output results.json
+python test/benchmark/pipeline.py --compare baseline.json results.json
+'''
+from __future__ import absolute_import, print_function
+from os.path import abspath, dirname
+import argparse
+import json
+import platform
+import sys
+import time
+
+from collectdutil import fauxllectd, utils
+
+sys.modules['collectd'] = fauxllectd
+sys.path.insert(0, dirname(dirname(dirname(abspath(__file__)))))
+
+from kong.config import Config  # noqa
+from kong.replay import replay, tracemalloc  # noqa
+from kong.synthetic import SyntheticStatus  # noqa
+
+
+configs = {  # Representative reporting configurations
+    'instance': '\n'.join('{0} false'.format(d) for d in ('ReportAPIIDs', 'ReportAPINames', 'ReportServiceIDs',
+                                                          'ReportServiceNames', 'ReportRouteIDs', 'ReportHTTPMethods',
+                                                          'ReportStatusCodeGroups')),
+    'default': '',
+    'status_codes': 'ReportStatusCodeGroups false\nReportStatusCodes true'
+}
+
+
+def run(contexts, config_name, reads, churn, memory):
+    synthetic = SyntheticStatus.with_contexts(contexts, churn=churn)
+    payloads = [json.dumps(synthetic.snapshot()) for _ in range(reads)]
+    config = Config(utils.ParsedConfig(configs[config_name]))
+    results = []
+    for result in replay(config, payloads, memory):  # A new reporter's decoded_contexts are empty, so read 0 is cold
+        result.pop('series')
+        result.update(contexts=synthetic.contexts, config=config_name)
+        results.append(result)
+        print('{contexts} contexts, {config}, read {read}: {total:.3f}s, {datapoints} datapoints'.format(
+            total=result['stages']['total'], **result), file=sys.stderr)
+    return results
+
+
+def compare(baseline_path, results_path):
+    def by_run(path):
+        with open(path) as f:
+            return dict(((r['contexts'], r['config'], r['read']), r) for r in json.load(f)['results'])
+
+    baseline, results = by_run(baseline_path), by_run(results_path)
+    for key in sorted(set(baseline) & set(results)):
+        stages = sorted(set(baseline[key]['stages']) & set(results[key]['stages']))
+        ratios = ['{0}: {1:.2f}x'.format(s, results[key]['stages'][s] / (baseline[key]['stages'][s] or 1e-9))
+                  for s in stages]
+        print('{0} contexts, {1}, read {2}: {3}'.format(key[0], key[1], key[2], ', '.join(ratios)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contexts', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--configs', nargs='+', choices=sorted(configs), default=sorted(configs))
+    parser.add_argument('--reads', type=int, default=3, help='Reads per run.  The first is cold.')
+    parser.add_argument('--churn', type=float, default=.01, help='Fraction of resources renamed between reads')
+    parser.add_argument('--memory', action='store_true', help='Also trace memory (slows timings)')
+    parser.add_argument('--output', help='JSON results path (default stdout)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'RESULTS'))
+    args = parser.parse_args()
+    if args.compare:
+        return compare(*args.compare)
+    if args.memory and tracemalloc is None:
+        parser.error('--memory requires Python 3.4 or later.')
+
+    results = []
+    for contexts in args.contexts:
+        for config_name in args.configs:
+            results.extend(run(contexts, config_name, args.reads, args.churn, args.memory))
+    output = dict(python=platform.python_version(), platform=platform.platform(), time=time.time(),
+                  results=results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(output, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+'''Measures the import time and resident memory kong_plugin adds to collectd's startup, the cost of configuring a
+Module block, and the imports deferred to the first read, each in fresh interpreters with fauxllectd as collectd.
+
+python test/benchmark/startup.py --repeat 10
+python test/benchmark/startup.py --directive 'AggregationProcesses 2' --output startup.json
+'''
+from __future__ import absolute_import, print_function
+from os.path import abspath, dirname
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+
+root = dirname(dirname(dirname(abspath(__file__))))
+heavy_modules = ('requests', 'urllib3', 'chardet', 'charset_normalizer', 'idna', 'multiprocessing', 'cProfile',
+                 'gzip', 'ssl')
+stages = ('import', 'configure', 'first_read')
+
+
+def resident_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except IOError:  # Not Linux.  Peak resident size is an upper bound
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def measure(config_string):
+    '''Runs each stage in this interpreter, returning {stage: {seconds, resident_bytes, heavy_modules}}.'''
+    from collectdutil import fauxllectd, utils
+    sys.modules['collectd'] = fauxllectd
+    sys.path.insert(0, root)
+    results = {}
+
+    def record(stage, t0, rss0):
+        results[stage] = dict(seconds=time.time() - t0, resident_bytes=resident_bytes() - rss0,
+                              heavy_modules=sorted(m for m in heavy_modules if m in sys.modules))
+
+    rss0, t0 = resident_bytes(), time.time()
+    import kong_plugin
+    record('import', t0, rss0)
+
+    rss0, t0 = resident_bytes(), time.time()
+    reporter = kong_plugin.Reporter()
+    reporter.load_config_and_register_read(utils.ParsedConfig(config_string))
+    record('configure', t0, rss0)
+
+    rss0, t0 = resident_bytes(), time.time()
+    reporter.new_kong_state()  # Imports deferred to the first read, without requesting the URL
+    record('first_read', t0, rss0)
+    if reporter.aggregator:
+        reporter.aggregator.close()
+    return results
+
+
+def median(values):
+    return sorted(values)[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters to take the median of')
+    parser.add_argument('-d', '--directive', action='append', dest='directives', default=[],
+                        help='Module block directive to configure with.  May be repeated')
+    parser.add_argument('--output', help='JSON results path (default stdout)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    config_string = '\n'.join(args.directives)
+    if args.child:
+        print(json.dumps(measure(config_string)))
+        return
+
+    runs = []
+    for _ in range(args.repeat):
+        command = [sys.executable, abspath(__file__), '--child']
+        for directive in args.directives:
+            command.extend(('-d', directive))
+        runs.append(json.loads(subprocess.check_output(command).decode('utf-8')))
+    results = {}
+    for stage in stages:
+        results[stage] = dict(seconds=median([r[stage]['seconds'] for r in runs]),
+                              resident_bytes=median([r[stage]['resident_bytes'] for r in runs]),
+                              heavy_modules=runs[-1][stage]['heavy_modules'])
+        print('{0:<12} {1:>8.1f} ms {2:>8.1f} MiB  {3}'.format(stage, results[stage]['seconds'] * 1000,
+                                                               results[stage]['resident_bytes'] / 1048576.,
+                                                               ' '.join(results[stage]['heavy_modules'])),
+              file=sys.stderr)
+    output = dict(python=platform.python_version(), platform=platform.platform(), time=time.time(),
+                  directives=args.directives, results=results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(output, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
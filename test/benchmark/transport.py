@@ -0,0 +1,87 @@
+'''Times fetching a static synthetic status view from a local fake Kong over loopback TCP, loopback TLS (with
+--certfile), and a Unix domain socket, through the pooled session of a Reporter, writing machine-readable results.
+
+python test/benchmark/transport.py --contexts 1000 100000 --requests 50
+python test/benchmark/transport.py --certfile cert.pem --output transport.json
+'''
+from __future__ import absolute_import, print_function
+from os.path import abspath, dirname, join
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+from collectdutil import fauxllectd, utils
+
+sys.modules['collectd'] = fauxllectd
+sys.path.insert(0, dirname(dirname(dirname(abspath(__file__)))))
+
+from kong.config import Config  # noqa
+from kong.fakekong import FakeKong, PayloadSource  # noqa
+from kong.reporter import Reporter  # noqa
+from kong.synthetic import SyntheticStatus  # noqa
+
+
+def median(values):
+    return sorted(values)[len(values) // 2]
+
+
+def run(contexts, transport, requests, certfile, socket_dir):
+    source = PayloadSource(SyntheticStatus.with_contexts(contexts), static=True)
+    kong = FakeKong(source, certfile=certfile if transport == 'tls' else None)
+    url = kong.start(socket_path=join(socket_dir, 'kong.sock') if transport == 'unix' else None)
+    try:
+        reporter = Reporter()
+        reporter.config = Config(utils.ParsedConfig('URL "{0}"\nVerifyCerts false'.format(url)))
+        reporter.reuse_connections = True
+        gets, jsons = [], []
+        t0 = time.time()
+        for _ in range(requests):
+            kong_state = reporter.new_kong_state()
+            kong_state.get_sfx_view()
+            gets.append(kong_state.timings['get'])
+            jsons.append(kong_state.timings['json'])
+        total = time.time() - t0
+    finally:
+        kong.stop()
+    return dict(contexts=contexts, transport=transport, requests=requests, payload_bytes=kong_state.payload_bytes,
+                get=median(gets), first_get=gets[0], json=median(jsons), total=total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contexts', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--requests', type=int, default=20, help='Requests per transport to take the median of')
+    parser.add_argument('--certfile', help='Server certificate and key to also time loopback TLS with')
+    parser.add_argument('--output', help='JSON results path (default stdout)')
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')  # Unverified loopback TLS
+    transports = ['tcp', 'unix'] + (['tls'] if args.certfile else [])
+    socket_dir = tempfile.mkdtemp()
+    results = []
+    try:
+        for contexts in args.contexts:
+            for transport in transports:
+                result = run(contexts, transport, args.requests, args.certfile, socket_dir)
+                results.append(result)
+                print('{contexts} contexts ({payload_bytes} bytes), {transport}: get {get_ms:.2f} ms median, '
+                      '{first_ms:.2f} ms first'.format(get_ms=result['get'] * 1000, first_ms=result['first_get'] * 1000,
+                                                       **result), file=sys.stderr)
+    finally:
+        shutil.rmtree(socket_dir)
+    output = dict(python=platform.python_version(), platform=platform.platform(), time=time.time(),
+                  results=results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(output, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+from __future__ import absolute_import
+from os.path import dirname
+import json
+
+import pytest
+
+from unit.conftest import plugin_config
+from kong.aggregation import ShardedAggregator, sum_encoded_metrics
+from kong.kong_state import KongState
+from kong.reporter import Reporter
+
+
+@pytest.fixture(scope='module')
+def aggregator():
+    aggregator = ShardedAggregator(2)
+    yield aggregator
+    aggregator.close()
+
+
+def encoded_kong_state(state_file='status.json'):
+    status = json.load(open('{0}/{1}'.format(dirname(__file__), state_file)))
+    kong_state = KongState(decoded_contexts={}, decode_metrics=False)
+    kong_state.get_sfx_view = lambda: status
+    kong_state.update_from_sfx()
+    return kong_state
+
+
+def test_sum_encoded_metrics():
+    partials = sum_encoded_metrics([(0, ['1,2,3,4,5,6,200:1:4:5:6', '2,2,2,2,2,2,200:2:2:2:2,404:0:1:1:1']),
+                                    (1, ['1,1,1,1,1,1'])])
+    assert partials[0] == (dict(response_count=3, request_latency=4, kong_latency=5, upstream_latency=6,
+                                request_size=7, response_size=8),
+                           {'200': dict(response_count=3, upstream_latency=6, request_size=7, response_size=8),
+                            '404': dict(response_count=0, upstream_latency=1, request_size=1, response_size=1)})
+    assert partials[1][1] == {}
+
+
+def test_partition_splits_groups(aggregator):
+    groups = [set(['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j']), set(['k'])]
+    encoded = dict([(c, c) for group in groups for c in group])
+    chunks = aggregator.partition(groups, encoded)
+    assert len(chunks) > 1
+    assert sorted([c for chunk in chunks for _, run in chunk for c in run]) == sorted(encoded)
+    assert set([i for chunk in chunks for i, _ in chunk]) == set([0, 1])
+
+
+@pytest.mark.parametrize('state_file', ['status.json', 'status_snapshot_1.json'])
+@pytest.mark.parametrize('config_kwargs', [dict(), dict(report_http_method=True),
+                                           dict(report_route_id=True, report_http_method=True,
+                                                report_status_code=True),
+                                           dict(report_http_method=True, report_status_code_group=True)])
+def test_sharded_metrics_match(kong_state_from_file, aggregator, state_file, config_kwargs):
+    reporter = Reporter()
+    reporter.config = plugin_config(**config_kwargs)
+    reporter.kong_state = kong_state_from_file(state_file)
+    reporter.update_http_method_scope_groups()
+    expected = dict()
+    for metric in ('request_latency', 'response_count'):
+        expected[metric] = reporter.calculate_http_method_scope_metrics(metric)
+    expected['status'] = reporter.calculate_status_code_scope_metrics('response_size')
+
+    sharded = Reporter()
+    sharded.config = reporter.config
+    sharded.kong_state = encoded_kong_state(state_file)
+    sharded.update_http_method_scope_groups()
+    group_sums = aggregator.aggregate(sharded.http_method_scoped_groups, sharded.kong_state.encoded_metrics)
+    calculated = dict()
+    for metric in ('request_latency', 'response_count'):
+        calculated[metric] = sharded.calculate_http_method_scope_metrics(metric, group_sums)
+    calculated['status'] = sharded.calculate_status_code_scope_metrics('response_size', group_sums)
+
+    def values(metrics):
+        return sorted([(sorted(m.dimensions.items()), m.value) for m in metrics])
+
+    for key in expected:
+        assert values(calculated[key]) == values(expected[key])
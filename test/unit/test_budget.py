@@ -0,0 +1,57 @@
+from __future__ import absolute_import
+
+import pytest
+
+from unit.conftest import plugin_config
+from kong.budget import ReadBudget, degraded_config, detail_levels, recovery_reads
+from kong.grouper import Grouper
+
+
+def test_degrades_one_level_per_read_over_budget():
+    budget = ReadBudget(5)
+    for level in range(1, len(detail_levels)):
+        assert budget.update(6) == level
+    assert budget.update(6) == len(detail_levels) - 1
+
+
+def test_recovers_after_consecutive_reads_within_budget():
+    budget = ReadBudget(5)
+    budget.update(6)
+    budget.update(6)
+    for _ in range(recovery_reads - 1):
+        assert budget.update(1) == 2
+    assert budget.update(1) == 1
+    for _ in range(recovery_reads - 1):
+        budget.update(1)
+    budget.update(6)
+    assert budget.level == 2
+    for _ in range(recovery_reads * 2):
+        budget.update(1)
+    assert budget.level == 0
+
+
+def test_full_detail_config_is_unchanged():
+    config = plugin_config(report_status_code=True)
+    assert degraded_config(config, 0) is config
+
+
+@pytest.mark.parametrize('level', range(1, len(detail_levels)))
+def test_degraded_config_flags(level):
+    config = plugin_config(resource_types=['api', 'service'], report_id=True, report_name=True,
+                           report_route_id=True, report_http_method=True, report_status_code=True)
+    degraded = degraded_config(config, level)
+    assert config.will_report_status_codes
+    assert not degraded.will_report_status_codes
+    assert degraded.will_report_http_methods == (level < detail_levels.index('no_http_methods'))
+    assert degraded.will_report_route_ids == (level < detail_levels.index('no_route_ids'))
+    assert degraded.will_report_apis == (level < detail_levels.index('instance'))
+    assert degraded.will_report_services == (level < detail_levels.index('instance'))
+
+
+def test_instance_level_forms_single_group(kong_state):
+    config = plugin_config(resource_types=['api', 'service'], report_id=True, report_name=True,
+                           report_route_id=True, report_http_method=True, report_status_code=True)
+    groups = Grouper(kong_state, degraded_config(config, detail_levels.index('instance'))
+                     ).get_http_method_scoped_groups()
+    assert len(groups) == 1
+    assert groups[0] == set(kong_state.resource_metrics)
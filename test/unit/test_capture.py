@@ -0,0 +1,44 @@
+from __future__ import absolute_import
+import os
+
+from kong.capture import PayloadRecorder, captures, load_payload, load_payload_file
+
+
+def test_record_and_load(tmpdir):
+    recorder = PayloadRecorder(str(tmpdir.join('captures')))
+    path = recorder.record(b'{"signalfx": {}}', timestamp=1500000000.123)
+    assert os.path.basename(path).startswith('kong-status-20170714T024000123-{0}-'.format(os.getpid()))
+    assert captures(recorder.directory) == [path]
+    assert load_payload(path) == b'{"signalfx": {}}'
+
+
+def test_rotation(tmpdir):
+    recorder = PayloadRecorder(str(tmpdir), max_files=3)
+    paths = [recorder.record(str(i).encode('utf-8'), timestamp=1500000000 + i) for i in range(5)]
+    assert recorder.captures() == paths[2:]
+    assert [load_payload(p) for p in recorder.captures()] == [b'2', b'3', b'4']
+    tmpdir.join('unrelated.txt').write('')
+    recorder.record(b'5', timestamp=1500000005)
+    assert len(recorder.captures()) == 3
+    assert tmpdir.join('unrelated.txt').check()
+
+
+def test_same_millisecond_captures(tmpdir):
+    recorder = PayloadRecorder(str(tmpdir))
+    paths = [recorder.record(str(i).encode('utf-8'), timestamp=1500000000.123) for i in range(3)]
+    assert len(set(paths)) == 3
+    assert [load_payload(p) for p in recorder.captures()] == [b'0', b'1', b'2']
+
+
+def test_rotation_of_existing_captures(tmpdir):
+    paths = [PayloadRecorder(str(tmpdir)).record(b'0', timestamp=1500000000 + i) for i in range(3)]
+    recorder = PayloadRecorder(str(tmpdir), max_files=2)
+    path = recorder.record(b'3', timestamp=1500000003)
+    assert recorder.captures() == paths[2:] + [path]
+
+
+def test_load_payload_file(tmpdir):
+    path = PayloadRecorder(str(tmpdir)).record(b'{"signalfx": {}}')
+    assert load_payload_file(path) == b'{"signalfx": {}}'
+    tmpdir.join('status.json').write('{}')
+    assert load_payload_file(str(tmpdir.join('status.json'))) == b'{}'
@@ -119,6 +119,44 @@ def test_https_settings():
     assert cfg.client_cert_key is None
 
 
+def test_socket_settings():
+    cfg = Config()
+    assert cfg.socket_path is None
+    assert cfg.request_url == 'http://localhost:8001/signalfx'
+    cfg = Config(ParsedConfig('URL "unix:///usr/local/kong/admin.sock"'))
+    assert cfg.socket_path == '/usr/local/kong/admin.sock'
+    assert cfg.request_url == 'http://localhost/signalfx'
+    cfg = Config(ParsedConfig('URL "unix:///usr/local/kong/admin.sock:/status"'))
+    assert cfg.socket_path == '/usr/local/kong/admin.sock'
+    assert cfg.request_url == 'http://localhost/status'
+    cfg = Config(ParsedConfig('Socket "/usr/local/kong/admin.sock"\nURL "http://kong/signalfx"'))
+    assert cfg.socket_path == '/usr/local/kong/admin.sock'
+    assert cfg.request_url == 'http://kong/signalfx'
+    with pytest.raises(TypeError) as e:
+        Config(ParsedConfig('Socket "/tmp/kong.sock"\nURL "unix:///tmp/kong.sock"'))
+    assert 'Cannot combine Socket' in str(e)
+    with pytest.raises(TypeError):
+        Config(ParsedConfig('URL "unix://"'))
+
+
+def test_sample_url():
+    assert Config().sample_request_url == 'http://localhost:8001/status'
+    cfg = Config(ParsedConfig('URL "unix:///usr/local/kong/admin.sock"'))
+    assert cfg.sample_request_url == 'http://localhost/status'
+    cfg = Config(ParsedConfig('URL "https://kong:8444/admin/signalfx?x=1"'))
+    assert cfg.sample_request_url == 'https://kong:8444/admin/status'
+    cfg = Config(ParsedConfig('SampleURL "http://kong:8001/signalfx"'))
+    assert cfg.sample_request_url == 'http://kong:8001/signalfx'
+
+
+def test_json_backend():
+    assert Config().json_backend is None
+    assert Config(ParsedConfig('JSONBackend "json"')).json_backend == 'json'
+    with pytest.raises(TypeError) as e:
+        Config(ParsedConfig('JSONBackend "yaml"'))
+    assert 'Invalid JSONBackend' in str(e)
+
+
 def test_pattern_list_attributes_are_pattern_lists():
     pattern_list_attrs = ('http_methods_whitelist', 'http_methods_blacklist',
                           'status_codes_whitelist', 'status_codes_blacklist',
@@ -282,3 +320,22 @@ def test_included_host():
 def test_missing_host():
     config = Config()
     assert config.host is None
+
+
+def test_derived_metrics():
+    config = Config()
+    assert config.derive_metrics is False
+    assert config.emit_raw_counters is True
+    config = Config(ParsedConfig('DeriveMetrics true\nEmitRawCounters false'))
+    assert config.derive_metrics is True
+    assert config.emit_raw_counters is False
+    with pytest.raises(Exception) as e:
+        Config(ParsedConfig('DeriveMetrics false\nEmitRawCounters false'))
+    assert 'Cannot disable EmitRawCounters' in str(e)
+
+
+def test_fingerprint():
+    assert Config().fingerprint() == Config().fingerprint()
+    assert Config(parsed_config).fingerprint() == config.fingerprint()
+    assert Config().fingerprint() != config.fingerprint()
+    assert Config().fingerprint() != Config(ParsedConfig('ExtraDimension "some_dimension" "some_val"')).fingerprint()
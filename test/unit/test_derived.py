@@ -0,0 +1,81 @@
+from __future__ import absolute_import
+
+from collectdutil.metrics import Metric
+import pytest
+
+from kong.config import metrics as metric_types
+from kong.derived import DerivedMetrics
+
+
+def counter(metric, value, **dimensions):
+    return Metric(metric_types[metric][0], 'counter', value, plugin='kong', dimensions=dimensions)
+
+
+def derived_by_type_instance(derived):
+    by_type_instance = {}
+    for type_instance, value, dimensions in derived:
+        by_type_instance.setdefault(type_instance, []).append((value, dimensions))
+    return by_type_instance
+
+
+def test_nothing_derived_on_first_read():
+    derived = DerivedMetrics()
+    assert derived.derive([('response_count', [counter('response_count', 10)], False)], metric_types, now=0) == []
+
+
+def test_rates():
+    derived = DerivedMetrics()
+    derived.derive([('response_count', [counter('response_count', 10, http_method='GET')], False)],
+                   metric_types, now=0)
+    values = derived.derive([('response_count', [counter('response_count', 30, http_method='GET')], False)],
+                            metric_types, now=10)
+    assert values == [('kong.responses.count.rate', 2.0, dict(http_method='GET'))]
+
+
+def test_counter_reset_uses_current_value():
+    derived = DerivedMetrics()
+    derived.derive([('response_count', [counter('response_count', 100)], False)], metric_types, now=0)
+    values = derived.derive([('response_count', [counter('response_count', 5)], False)], metric_types, now=5)
+    assert values == [('kong.responses.count.rate', 1.0, {})]
+
+
+def test_absent_series_are_forgotten():
+    derived = DerivedMetrics()
+    derived.derive([('response_count', [counter('response_count', 10, http_method='GET')], False)],
+                   metric_types, now=0)
+    derived.derive([('response_count', [counter('response_count', 10, http_method='PUT')], False)],
+                   metric_types, now=10)
+    assert list(derived.previous) == [('response_count', frozenset([('http_method', 'PUT')]))]
+
+
+def test_http_scoped_mean_latency_from_status_scoped_counts():
+    derived = DerivedMetrics()
+    for now, latency, ok, error in ((0, 100, 10, 0), (10, 400, 15, 5)):
+        counters = [('request_latency', [counter('request_latency', latency, http_method='GET')], False),
+                    ('response_count', [counter('response_count', ok, http_method='GET', status_code='2xx'),
+                                        counter('response_count', error, http_method='GET', status_code='5xx')],
+                     True)]
+        values = derived_by_type_instance(derived.derive(counters, metric_types, now=now))
+    assert values['kong.requests.latency.mean'] == [(30.0, dict(http_method='GET'))]
+    assert values['kong.responses.error_ratio'] == [(0.5, dict(http_method='GET'))]
+
+
+@pytest.mark.parametrize('status_code', ('2xx', '404'))
+def test_status_scoped_mean_latency(status_code):
+    derived = DerivedMetrics()
+    for now, latency, count in ((0, 100, 10), (10, 300, 20)):
+        counters = [('upstream_latency', [counter('upstream_latency', latency, status_code=status_code)], True),
+                    ('response_count', [counter('response_count', count, status_code=status_code)], True)]
+        values = derived_by_type_instance(derived.derive(counters, metric_types, now=now))
+    assert values['kong.upstream.latency.mean'] == [(20.0, dict(status_code=status_code))]
+    assert values['kong.responses.error_ratio'] == [(0.0, {})]
+
+
+def test_no_mean_latency_without_responses():
+    derived = DerivedMetrics()
+    for now in (0, 10):
+        counters = [('request_latency', [counter('request_latency', 100)], False),
+                    ('response_count', [counter('response_count', 10)], False)]
+        values = derived_by_type_instance(derived.derive(counters, metric_types, now=now))
+    assert 'kong.requests.latency.mean' not in values
+    assert 'kong.responses.error_ratio' not in values
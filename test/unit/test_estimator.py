@@ -0,0 +1,56 @@
+from __future__ import absolute_import
+from os.path import abspath, dirname
+import subprocess
+import sys
+
+from collectdutil.utils import ParsedConfig
+
+from kong.config import Config
+from kong.estimator import estimate, format_estimates, main, pattern_source
+
+
+def payload(state_file='status.json'):
+    with open('{0}/{1}'.format(dirname(__file__), state_file), 'rb') as f:
+        return f.read()
+
+
+def test_pattern_source():
+    config = Config(ParsedConfig('ReportRouteIDs true\nHTTPMethods "G*" "P*"\nReportStatusCodeGroups true'))
+    assert pattern_source(config, 'route_id', 'abc') == ('ReportRouteIDs', 'true')
+    assert pattern_source(config, 'http_method', 'POST') == ('HTTPMethods', 'P*')
+    assert pattern_source(config, 'status_code', '2xx') == ('ReportStatusCodeGroups', 'true')
+
+
+def test_estimate_fan_out():
+    coarse = estimate(Config(ParsedConfig('ReportHTTPMethods false\nReportStatusCodeGroups false')), payload(), 1)
+    fine = estimate(Config(ParsedConfig('ReportStatusCodeGroups false\nReportStatusCodes true')), payload(), 1)
+    assert fine['series'] > coarse['series']
+    assert fine['groups'] >= coarse['groups']
+    assert 'http_method' not in coarse['dimensions']
+    assert fine['dimensions']['status_code']['series'] > 0
+    assert sum(fine['metrics'].values()) == fine['series']
+    fan_out = fine['fan_out']
+    assert [f[0] for f in fan_out] == sorted([f[0] for f in fan_out], reverse=True)
+    assert ('status_code', 'ReportStatusCodes', 'true') in [f[1:4] for f in fan_out]
+    assert fine['cpu_seconds'] > 0
+
+    formatted = format_estimates([coarse, fine], ['coarse.conf', 'fine.conf'])
+    assert 'x{0:.2f}'.format(float(fine['series']) / coarse['series']) in formatted
+
+
+def test_main_compare(tmpdir, capsys):
+    status = tmpdir.join('status.json')
+    status.write_binary(payload())
+    proposed = tmpdir.join('proposed.conf')
+    proposed.write('ReportStatusCodeGroups false\nReportStatusCodes true')
+    main([str(status), '--compare', str(proposed), '--reads', '1'])
+    out = capsys.readouterr()[0]
+    assert 'proposed.conf' in out
+    assert 'Largest fan-out' in out
+
+
+def test_module_runs_outside_collectd():
+    root = dirname(dirname(dirname(abspath(__file__))))
+    out = subprocess.check_output([sys.executable, '-m', 'kong.estimator', 'test/unit/status.json', '--reads', '1'],
+                                  cwd=root).decode('utf-8')
+    assert 'Largest fan-out' in out
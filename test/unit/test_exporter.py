@@ -0,0 +1,90 @@
+from __future__ import absolute_import
+from os.path import dirname
+import json
+
+from collectdutil.utils import ParsedConfig
+from six.moves.urllib.error import HTTPError
+from six.moves.urllib.request import urlopen
+import pytest
+
+from kong.exporter import Exporter, ExporterReporter, content_type, metric_name, render, sanitized_name
+from kong.kong_state import KongState
+
+
+def test_metric_name():
+    assert metric_name('kong.responses.count', 'counter') == 'kong_responses_count_total'
+    assert metric_name('kong.connections.active', 'gauge') == 'kong_connections_active'
+
+
+def test_sanitized_name():
+    assert sanitized_name('team-name') == 'team_name'
+    assert sanitized_name('team.name/x y') == 'team_name_x_y'
+    assert sanitized_name('5xx') == '_5xx'
+    assert sanitized_name('route_id') == 'route_id'
+
+
+def test_render_sanitizes_label_names():
+    body = render([('kong_connections_active', 'gauge', 1, {'team-name': 'a', '1st': 'b'})])
+    assert body.decode('utf-8').splitlines()[1] == 'kong_connections_active{_1st="b",team_name="a"} 1'
+
+
+def test_render():
+    body = render([('kong_responses_count_total', 'counter', 10, dict(status_code='2xx', route_id='a')),
+                   ('kong_connections_active', 'gauge', 1.5, {}),
+                   ('kong_responses_count_total', 'counter', 2, dict(service_name='x"y\\z\n'))])
+    assert body.decode('utf-8').splitlines() == [
+        '# TYPE kong_connections_active gauge',
+        'kong_connections_active 1.5',
+        '# TYPE kong_responses_count_total counter',
+        'kong_responses_count_total{route_id="a",status_code="2xx"} 10',
+        'kong_responses_count_total{service_name="x\\"y\\\\z\\n"} 2']
+
+
+@pytest.fixture()
+def exporter():
+    status = json.load(open('{0}/status.json'.format(dirname(__file__))))
+    reporter = ExporterReporter()
+    reporter.load_config(ParsedConfig('ReportStatusCodeGroups true'))
+    fetches = []
+
+    def new_kong_state():
+        fetches.append(1)
+        kong_state = KongState(decoded_contexts={})
+        kong_state.get_sfx_view = lambda: status
+        return kong_state
+
+    reporter.new_kong_state = new_kong_state
+    exporter = Exporter(reporter, interval=3600)
+    exporter.fetches = fetches
+    yield exporter
+    exporter.stop()
+
+
+def test_scrapes_serve_rendered_read(exporter):
+    host, port = exporter.start('127.0.0.1', 0)
+    assert len(exporter.fetches) == 1
+    for _ in range(3):
+        response = urlopen('http://{0}:{1}/metrics'.format(host, port))
+        assert response.headers['Content-Type'] == content_type
+        body = response.read().decode('utf-8')
+    assert len(exporter.fetches) == 1
+    assert '# TYPE kong_responses_count_total counter\n' in body
+    assert 'status_code="2xx"' in body
+    assert 'kong_exporter_refreshes_total 1\n' in body
+    with pytest.raises(HTTPError):
+        urlopen('http://{0}:{1}/other'.format(host, port))
+
+
+def test_failed_refresh_keeps_previous_read(exporter):
+    exporter.refresh()
+    samples = exporter.samples
+    assert samples
+
+    def fail():
+        raise Exception('Unreachable')
+
+    exporter.reporter.new_kong_state = fail
+    exporter.refresh()
+    assert exporter.samples is samples
+    assert (exporter.refreshes, exporter.refresh_errors) == (1, 1)
+    assert b'kong_exporter_refresh_errors_total 1\n' in exporter.body
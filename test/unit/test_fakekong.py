@@ -0,0 +1,96 @@
+from __future__ import absolute_import
+import gzip
+import io
+import json
+
+from collectdutil.utils import ParsedConfig
+from requests import get
+import pytest
+
+from kong.capture import PayloadRecorder
+from kong.config import Config
+from kong.fakekong import FakeKong, PayloadSource
+from kong.kong_state import KongState, ResponseTooLarge
+from kong.reporter import Reporter
+from kong.synthetic import SyntheticStatus
+
+
+@pytest.fixture()
+def fake_kong(request):
+    kongs = []
+
+    def fake_kong(*args, **kwargs):
+        kong = FakeKong(*args, **kwargs)
+        kong.start()
+        kongs.append(kong)
+        return kong
+
+    yield fake_kong
+    for kong in kongs:
+        kong.stop()
+
+
+@pytest.mark.parametrize('options', (dict(), dict(gzip=True), dict(chunk_size=1000),
+                                     dict(gzip=True, chunk_size=100), dict(latency=.01)))
+def test_kong_state_update(fake_kong, options):
+    synthetic = SyntheticStatus(services=10, routes_per_service=2)
+    kong = fake_kong(PayloadSource(synthetic), **options)
+    kong_state = KongState(url=kong.url)
+    kong_state.update_from_sfx()
+    assert len(kong_state.resource_metrics) == synthetic.contexts
+    assert kong_state.server_metrics['total_requests']
+
+
+@pytest.mark.parametrize('options', (dict(), dict(gzip=True), dict(chunk_size=1000)))
+def test_max_response_bytes(fake_kong, options):
+    kong = fake_kong(PayloadSource(SyntheticStatus(services=10, routes_per_service=2), static=True), **options)
+    kong_state = KongState(url=kong.url, max_response_bytes=1000000)
+    kong_state.update_from_sfx()
+    limit = kong_state.payload_bytes - 1
+    with pytest.raises(ResponseTooLarge):
+        KongState(url=kong.url, max_response_bytes=limit).update_from_sfx()
+    assert KongState(url=kong.url, max_response_bytes=limit + 1).get_sfx_view()['signalfx']
+
+
+def test_status_endpoint_gauge_samples(fake_kong):
+    synthetic = SyntheticStatus(services=10, routes_per_service=2)
+    kong = fake_kong(PayloadSource(synthetic))
+    assert sorted(json.loads(get(kong.url.replace('/signalfx', '/status')).text)) == ['database', 'server']
+    reporter = Reporter()
+    reporter.config = Config(ParsedConfig('URL "{0}"\nSampleInterval 1\nMetric "connections_active" true'.format(
+        kong.url)))
+    reporter.reuse_connections = True
+    reporter.new_kong_state().update_from_sfx()
+    reporter.sample_gauges()
+    assert reporter.sample_session is not None and reporter.sample_session is not reporter.session
+    assert list(reporter.gauge_sampler.drain()) == ['connections_active']
+
+
+def test_gzip_and_chunked_encoding(fake_kong):
+    kong = fake_kong(gzip=True, chunk_size=10)
+    r = get(kong.url, headers={'Accept-Encoding': 'gzip'}, stream=True)
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert r.headers['Transfer-Encoding'] == 'chunked'
+    body = gzip.GzipFile(fileobj=io.BytesIO(r.raw.read())).read()
+    assert 'signalfx' in json.loads(body.decode('utf-8'))
+
+
+def test_static_and_advancing_payloads():
+    advancing = PayloadSource()
+    assert advancing.next() != advancing.next()
+    static = PayloadSource(static=True)
+    assert static.next() is static.next()
+
+
+def test_captured_payloads(fake_kong, tmpdir):
+    recorder = PayloadRecorder(str(tmpdir))
+    paths = [recorder.record(json.dumps(dict(signalfx={}, server=dict(total_requests=i), database={})).encode(),
+                             timestamp=1500000000 + i) for i in range(2)]
+    kong = fake_kong(PayloadSource(capture_paths=paths))
+    assert [get(kong.url).json()['server']['total_requests'] for _ in range(3)] == [0, 1, 0]
+
+
+def test_injected_errors(fake_kong):
+    kong = fake_kong(error_rate=1)
+    assert get(kong.url).status_code == 500
+    assert kong.requests == 1
@@ -0,0 +1,63 @@
+from __future__ import absolute_import
+
+from collectdutil.utils import ParsedConfig
+from requests import Session
+
+from kong.fakekong import FakeKong, PayloadSource
+from kong.introspection import Introspection, group_sizes, stage_histograms
+from kong.reporter import Reporter
+from kong.synthetic import SyntheticStatus
+from kong.unixsocket import UnixSocketAdapter
+
+
+def test_stage_histograms():
+    recent = [dict(total=.0005, get=.3), dict(total=.015), dict(total=.015), dict(total=100)]
+    histograms = stage_histograms(recent)
+    total = histograms['total']
+    assert (total['count'], total['min'], total['median'], total['max']) == (4, .0005, .015, 100)
+    buckets = dict([(bound, count) for bound, count in total['buckets'] if count])
+    assert buckets == {.001: 1, .02: 2, None: 1}
+    assert histograms['get']['count'] == 1
+
+
+def test_group_sizes():
+    assert group_sizes([set('ab'), set('c'), frozenset()]) == dict(groups=3, contexts=3, largest=2)
+    assert group_sizes([]) == dict(groups=0, contexts=0, largest=0)
+
+
+def test_recent_reads_are_bounded():
+    introspection = Introspection(reads=3)
+    for read in range(5):
+        introspection.publish(dict(read=read), dict(total=read), ())
+    assert introspection.recent == (dict(total=2), dict(total=3), dict(total=4))
+    introspection.failed(ValueError('bad'))
+    snapshot = introspection.snapshot()
+    assert (snapshot['read'], snapshot['reads'], snapshot['failed_reads']) == (4, 5, 1)
+    assert snapshot['last_error']['error'] == 'ValueError: bad'
+    assert snapshot['stages']['total']['count'] == 3
+
+
+def test_reporter_introspection_socket(tmpdir):
+    kong = FakeKong(PayloadSource(SyntheticStatus(services=10, routes_per_service=2)))
+    url = kong.start()
+    socket_path = str(tmpdir.join('introspection.sock'))
+    reporter = Reporter()
+    reporter.load_config(ParsedConfig('URL "{0}"\nIntrospectionSocket "{1}"\nRouteIDs "*"'.format(url, socket_path)))
+    reporter.introspection.start()
+    try:
+        for _ in range(2):
+            reporter.update_and_report()
+        session = Session()
+        session.mount('http://', UnixSocketAdapter(socket_path))
+        state = session.get('http://localhost/').json()
+        assert session.get('http://localhost/missing').status_code == 404
+    finally:
+        reporter.introspection.stop()
+        kong.stop()
+    assert state['reads'] == 2
+    assert state['contexts'] == reporter.kong_state.context_count
+    assert state['group_plan'] == dict(groups=len(reporter.http_method_scoped_groups), hits=1, misses=1)
+    assert state['group_plan_sizes']['contexts'] == reporter.kong_state.context_count
+    assert state['stages']['total']['count'] == 2
+    assert sum(state['patterns']['RouteIDs']['matches'].values()) > 0
+    assert not tmpdir.join('introspection.sock').exists()
@@ -0,0 +1,43 @@
+from __future__ import absolute_import
+import json
+
+import pytest
+
+from kong import jsonbackend
+from kong.jsonbackend import backend_loads, backends, select_backend
+from kong.synthetic import SyntheticStatus
+
+
+@pytest.mark.parametrize('name', backends)
+def test_backends_decode_bytes(name):
+    try:
+        loads = backend_loads(name)
+    except ImportError:
+        pytest.skip('{0} is not installed'.format(name))
+    status = SyntheticStatus(services=5, routes_per_service=2).snapshot()
+    payload = json.dumps(status)
+    assert loads(payload.encode('utf-8')) == status
+    assert loads(payload) == status
+
+
+def test_select_backend_falls_back(monkeypatch):
+    monkeypatch.setattr(jsonbackend, 'selected', {})
+    available = jsonbackend.backend_loads
+
+    def backend_loads(name):
+        if name != 'json':
+            raise ImportError(name)
+        return available(name)
+
+    monkeypatch.setattr(jsonbackend, 'backend_loads', backend_loads)
+    name, loads = select_backend()
+    assert name == 'json'
+    assert select_backend() == (name, loads)
+    with pytest.raises(ImportError):
+        select_backend('orjson')
+    assert select_backend('json')[0] == 'json'
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        backend_loads('yaml')
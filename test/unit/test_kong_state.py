@@ -2,6 +2,8 @@ from collections import defaultdict
 
 import pytest
 
+from kong.kong_state import KongState, encode_resource_metrics, fold_resource_metrics, overflow_context
+
 
 def test_resource_metrics_field_integrity(kong_state):
     resource_metrics = kong_state.resource_metrics
@@ -51,3 +53,73 @@ def test_status_code_index_set_integrity(kong_state):
             status_codes[sc].add(context_hash)
     assert status_codes
     assert kong_state.status_codes == status_codes
+
+
+def test_update_without_resources(kong_state_from_file):
+    kong_state = kong_state_from_file()
+    sampled = KongState()
+    sampled.get_sfx_view = kong_state.get_sfx_view
+    sampled.update_from_sfx(resources=False)
+    assert sampled.server_metrics == kong_state.server_metrics
+    assert sampled.database_metrics == kong_state.database_metrics
+    assert sampled.resource_metrics == {}
+    assert not sampled.status_codes
+
+
+def test_context_values_are_shared(kong_state):
+    values = defaultdict(list)
+    for context in kong_state.resource_metrics.values():
+        for field in ('api_name', 'service_name', 'http_method'):
+            if context[field] is not None:
+                values[context[field]].append(context[field])
+        for status_code in context['status_codes']:
+            values[status_code].append(status_code)
+    assert any([len(instances) > 1 for instances in values.values()])
+    for value, instances in values.items():
+        assert all([instance is instances[0] for instance in instances])
+
+
+def totals(resource_metrics):
+    sums, status_sums = {}, {}
+    for metrics in resource_metrics.values():
+        for metric, value in metrics.items():
+            if isinstance(value, int):
+                sums[metric] = sums.get(metric, 0) + value
+        for status_code, sc_metrics in metrics['status_codes'].items():
+            sc_sums = status_sums.setdefault(status_code, {})
+            for metric, value in sc_metrics.items():
+                sc_sums[metric] = sc_sums.get(metric, 0) + value
+    return sums, status_sums
+
+
+def test_encode_resource_metrics_round_trip():
+    encoded = '1,2,3,4,5,6,200:1:2:3:4,404:5:6:7:8'
+    sums, status_sums = {}, {}
+    fold_resource_metrics(encoded, sums, status_sums)
+    folded = {}, {}
+    fold_resource_metrics(encode_resource_metrics(sums, status_sums), *folded)
+    assert folded == (sums, status_sums)
+
+
+def test_max_contexts_sums_overflow(kong_state_from_file):
+    full = kong_state_from_file()
+    status = full.get_sfx_view()
+    decoded_contexts = {}
+
+    def capped(sfx):
+        kong_state = KongState(decoded_contexts=decoded_contexts, max_contexts=5)
+        kong_state.get_sfx_view = lambda: dict(status, signalfx=sfx)
+        kong_state.update_from_sfx()
+        return kong_state
+
+    kong_state = capped(status['signalfx'])
+    assert len(kong_state.resource_metrics) == 6
+    assert kong_state.context_count == len(full.resource_metrics)
+    assert kong_state.overflow_contexts == len(full.resource_metrics) - 5
+    assert totals(kong_state.resource_metrics) == totals(full.resource_metrics)
+    overflow = [m for m in kong_state.resource_metrics.values() if m['resource_context'] == overflow_context]
+    assert [overflow[0][d] for d in ('api_id', 'service_id', 'route_id', 'http_method')] == [None] * 4
+
+    reordered = capped(dict(reversed(list(status['signalfx'].items()))))
+    assert set(reordered.resource_metrics) == set(kong_state.resource_metrics)  # Cached contexts kept first
+    assert capped(dict(list(status['signalfx'].items())[:3])).overflow_contexts == 0
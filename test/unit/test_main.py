@@ -0,0 +1,24 @@
+from __future__ import absolute_import
+from os.path import dirname
+
+from kong.__main__ import config_string, main
+
+
+def test_config_string(tmpdir):
+    config = tmpdir.join('kong.conf')
+    config.write('ReportHTTPMethods false')
+    assert config_string(str(config), ['ReportStatusCodes true'], 'http://kong:8001/signalfx') == (
+        'ReportHTTPMethods false\nReportStatusCodes true\nURL "http://kong:8001/signalfx"')
+
+
+def test_payload_reads(capsys):
+    status = '{0}/status.json'.format(dirname(__file__))
+    assert main(['--payload', status, '--reads', '2', '-d', 'ReportHTTPMethods false', '--series']) == 0
+    out = capsys.readouterr()[0]
+    assert 'Read 0: ' in out
+    assert 'Read 1: ' in out
+    assert 'fetch_index' in out
+    assert 'Series:\n' in out
+    assert 'http_method=' not in out
+    assert 'Series per metric:\n' in out
+    assert 'counter.kong.responses.count' in out
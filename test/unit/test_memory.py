@@ -0,0 +1,87 @@
+from __future__ import absolute_import
+import json
+
+from collectdutil.utils import ParsedConfig
+import pytest
+
+from kong.config import Config
+from kong.kong_state import KongState
+from kong.replay import ReplayReporter
+from kong.synthetic import SyntheticStatus
+
+tracemalloc = pytest.importorskip('tracemalloc')
+
+# Bytes per status context, roughly twice those observed on CPython 3.6 so doubling is caught
+state_retained_budget = 8000
+state_peak_budget = 10000
+pipeline_retained_budget = 24000
+pipeline_peak_budget = 32000
+flat_tolerance = 1.1  # Allowed growth of retained memory over the second half of churned reads
+
+
+def payloads(contexts, reads, churn=0.0):
+    '''Serializes payloads before tracing so only state pipeline allocations are measured.'''
+    synthetic = SyntheticStatus.with_contexts(contexts, churn=churn)
+    return synthetic.contexts, [json.dumps(synthetic.snapshot()).encode('utf-8') for _ in range(reads)]
+
+
+def state_reads(payloads):
+    '''Yields (retained bytes, peak bytes, cached contexts) after updating a KongState from each payload, with
+    state and the decoded_contexts cache retained between reads as Reporter does.'''
+    decoded_contexts = {}
+    tracemalloc.start()
+    try:
+        for payload in payloads:
+            kong_state = KongState(decoded_contexts=decoded_contexts)
+            kong_state.get_sfx_view = lambda payload=payload: json.loads(payload.decode('utf-8'))
+            kong_state.update_from_sfx()
+            yield tracemalloc.get_traced_memory() + (len(decoded_contexts),)
+    finally:
+        tracemalloc.stop()
+
+
+def pipeline_reads(payloads, config=''):
+    '''Yields (retained bytes, peak bytes, cached contexts) after each full Reporter read of payloads.'''
+    reporter = ReplayReporter(Config(ParsedConfig(config)), payloads)
+    tracemalloc.start()
+    try:
+        for _ in range(len(payloads)):
+            reporter.update_and_report()
+            yield tracemalloc.get_traced_memory() + (len(reporter.decoded_contexts),)
+    finally:
+        tracemalloc.stop()
+
+
+def assert_flat(retained):
+    half = len(retained) // 2
+    assert max(retained[half:]) <= max(retained[:half]) * flat_tolerance
+
+
+@pytest.mark.parametrize('contexts', [1000, 4000])
+def test_state_memory_per_context(contexts):
+    contexts, status_payloads = payloads(contexts, 3)
+    for retained, peak, _ in state_reads(status_payloads):
+        assert retained / contexts <= state_retained_budget
+        assert peak / contexts <= state_peak_budget
+
+
+@pytest.mark.parametrize('contexts', [1000, 4000])
+def test_pipeline_memory_per_context(contexts):
+    contexts, status_payloads = payloads(contexts, 3)
+    for retained, peak, _ in pipeline_reads(status_payloads):
+        assert retained / contexts <= pipeline_retained_budget
+        assert peak / contexts <= pipeline_peak_budget
+
+
+def test_state_memory_flat_with_churn():
+    contexts, status_payloads = payloads(2000, 30, churn=.05)
+    reads = list(state_reads(status_payloads))
+    assert_flat([retained for retained, _, _ in reads])
+    assert max([cached for _, _, cached in reads]) <= contexts * 1.3
+
+
+def test_pipeline_memory_flat_with_churn():
+    contexts, status_payloads = payloads(2000, 30, churn=.05)
+    reads = list(pipeline_reads(status_payloads))
+    assert_flat([retained for retained, _, _ in reads])
+    assert max([cached for _, _, cached in reads]) <= contexts * 1.3
@@ -0,0 +1,83 @@
+from __future__ import absolute_import
+from os.path import dirname
+
+from collectdutil.utils import ParsedConfig
+
+from kong.config import Config
+from kong.multivalue import (MultiValueMetric, combine_traffic_counters, encodable, plugin_instance, single_metrics,
+                             traffic_metrics, traffic_type)
+from kong.replay import ReplayReporter
+from kong.reporter import Reporter
+import kong.multivalue
+
+
+class DispatchedValues(object):
+
+    dispatched = []
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def dispatch(self):
+        self.dispatched.append(self)
+
+
+def counters(dimensions):
+    return [(metric, [Reporter.metric_class('kong.{0}'.format(metric), 'counter', i, plugin='kong',
+                                            dimensions=dimensions)], True)
+            for i, metric in enumerate(traffic_metrics + ('kong_latency',))]
+
+
+def test_types_db_data_sources():
+    with open('{0}/../../types.db'.format(dirname(__file__))) as f:
+        types = dict([line.split(None, 1) for line in f if line.strip() and not line.startswith('#')])
+    assert [ds.split(':')[0].strip() for ds in types[traffic_type].split(',')] == list(traffic_metrics)
+
+
+def test_combine_traffic_counters():
+    dimensions = dict(service_name='one', status_code='200')
+    combined = combine_traffic_counters(counters(dimensions))
+    assert len(combined) == 2
+    multi_value = [m for m in combined if isinstance(m, MultiValueMetric)][0]
+    assert multi_value.values == [0, 1, 2, 3]
+    assert multi_value.dimensions is dimensions
+    assert len(single_metrics(combined)) == len(traffic_metrics) + 1
+
+
+def test_incomplete_dimension_sets_dispatch_individually():
+    partial = counters(dict(service_name='one'))[1:]
+    combined = combine_traffic_counters(partial)
+    assert not [m for m in combined if isinstance(m, MultiValueMetric)]
+    assert len(combined) == len(partial)
+
+
+def test_unencodable_dimension_sets_dispatch_individually():
+    assert encodable(dict(service_name='one', status_code='200'))
+    for dimensions in (dict(service_name='a,b'), dict(service_name='a=b'), dict(service_name='[a]'),
+                       {'team=x': 'a'}, dict(service_name='x' * 128)):
+        assert not encodable(dimensions)
+        combined = combine_traffic_counters(counters(dimensions))
+        assert not [m for m in combined if isinstance(m, MultiValueMetric)]
+        assert len(combined) == len(traffic_metrics) + 1
+
+
+def test_emit(monkeypatch):
+    monkeypatch.setattr(kong.multivalue.collectd, 'Values', DispatchedValues, raising=False)
+    del DispatchedValues.dispatched[:]
+    MultiValueMetric([1, 2, 3, 4], dict(status_code='200', http_method='GET'), [], host='kong').emit()
+    values = DispatchedValues.dispatched[0]
+    assert values.type == traffic_type
+    assert values.values == [1, 2, 3, 4]
+    assert values.plugin_instance == plugin_instance(dict(http_method='GET', status_code='200'))
+    assert values.plugin_instance == '[http_method=GET,status_code=200]'
+    assert values.host == 'kong'
+
+
+def test_reads_dispatch_fewer_values():
+    payload = open('{0}/status.json'.format(dirname(__file__)), 'rb').read()
+    single = ReplayReporter(Config(ParsedConfig('')), [payload])
+    single.update_and_report()
+    multi = ReplayReporter(Config(ParsedConfig('MultiValueDispatch true')), [payload])
+    multi.update_and_report()
+    assert multi.series == single.series
+    assert multi.datapoints < single.datapoints
@@ -0,0 +1,86 @@
+from __future__ import absolute_import
+import os
+import pstats
+
+import pytest
+
+from kong.profiling import ReadProfiler, tracemalloc, trigger_file
+
+
+def profile_read(profiler, stage_timings=None):
+    profiler.start()
+    sum(range(1000))
+    profiler.stop(stage_timings or dict(total=1))
+
+
+def written(directory, extension):
+    return sorted(f for f in os.listdir(directory) if f.endswith(extension))
+
+
+def test_profile_first_reads(tmpdir):
+    directory = str(tmpdir)
+    profiler = ReadProfiler(directory, reads=2)
+    for _ in range(3):
+        profile_read(profiler, dict(get=0.5, total=1))
+    pstats_files = written(directory, '.pstats')
+    assert len(pstats_files) == 2
+    pstats.Stats(os.path.join(directory, pstats_files[0]))
+    stages = written(directory, '.stages')
+    assert len(stages) == 2
+    with open(os.path.join(directory, stages[0])) as f:
+        lines = f.read().splitlines()
+    assert lines[1:] == ['get: 0.5', 'total: 1']
+
+
+def test_trigger_file(tmpdir):
+    directory = str(tmpdir)
+    profiler = ReadProfiler(directory)
+    profile_read(profiler)
+    assert written(directory, '.pstats') == []
+    with open(os.path.join(directory, trigger_file), 'w') as f:
+        f.write('1')
+    profile_read(profiler)
+    profile_read(profiler)
+    assert len(written(directory, '.pstats')) == 1
+    assert not os.path.exists(os.path.join(directory, trigger_file))
+
+
+@pytest.mark.parametrize('slower_than, expected', ((0, 1), (60, 0)))
+def test_slower_than(tmpdir, slower_than, expected):
+    directory = str(tmpdir)
+    profiler = ReadProfiler(directory, slower_than=slower_than)
+    profile_read(profiler)
+    assert len(written(directory, '.pstats')) == expected
+
+
+@pytest.mark.skipif(tracemalloc is None, reason='tracemalloc requires Python 3.4')
+def test_tracemalloc(tmpdir):
+    directory = str(tmpdir)
+    profiler = ReadProfiler(directory, reads=2, trace_malloc=True)
+    try:
+        profile_read(profiler)
+        profile_read(profiler)
+    finally:
+        tracemalloc.stop()
+    snapshots = written(directory, '.tracemalloc')
+    assert len(snapshots) == 2
+    with open(os.path.join(directory, snapshots[-1])) as f:
+        assert 'changes since previous snapshot' in f.read()
+
+
+def test_failed_read_stages(tmpdir):
+    from kong.reporter import Reporter
+
+    def failed_read():
+        raise IOError('Kong unavailable')
+
+    directory = str(tmpdir)
+    reporter = Reporter()
+    reporter.profiler = ReadProfiler(directory, reads=1)
+    reporter.stage_timings = dict(get=0.5, total=1)  # From a previous read
+    reporter.update_and_report_within_budget = failed_read
+    with pytest.raises(IOError):
+        reporter.update_and_report()
+    stages = written(directory, '.stages')
+    with open(os.path.join(directory, stages[0])) as f:
+        assert f.read().splitlines()[1:] == []
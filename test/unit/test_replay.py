@@ -0,0 +1,32 @@
+from __future__ import absolute_import
+from os.path import dirname
+import json
+
+from collectdutil.utils import ParsedConfig
+
+from kong.config import Config
+from kong.replay import replay
+
+
+def payload(state_file):
+    with open('{0}/{1}'.format(dirname(__file__), state_file), 'rb') as f:
+        return f.read()
+
+
+def test_replay():
+    config = Config(ParsedConfig('ReportStatusCodeGroups false\nReportHTTPMethods false'))
+    payloads = [payload('status_snapshot_1.json'), lambda: payload('status_snapshot_2.json')]
+    results = list(replay(config, payloads))
+    assert [r['read'] for r in results] == [0, 1]
+    expected_contexts = len(json.loads(payloads[0].decode('utf-8'))['signalfx'])
+    for result in results:
+        assert result['contexts'] == expected_contexts
+        assert result['datapoints'] == len(result['series'])
+        assert 'json' in result['stages']
+        assert 'total' in result['stages']
+        for metric_type, type_instance, dimensions in result['series']:
+            assert type_instance.startswith('kong.')
+            assert 'http_method' not in dict(dimensions)
+    assert set(type_instance for _, type_instance, _ in results[0]['series']) == set(
+        ['kong.responses.count', 'kong.responses.size', 'kong.requests.size', 'kong.upstream.latency',
+         'kong.requests.count'])
@@ -1,4 +1,7 @@
 from __future__ import absolute_import
+from os.path import abspath, dirname
+import subprocess
+import sys
 
 from collectdutil.utils import ParsedConfig
 import pytest
@@ -233,3 +236,103 @@ def test_confirm_metrics_source_extra_dimensions(reporter, metric):
     for met in metrics:
         assert met.dimensions['test_dimension'] == 'test_val'
         assert met.dimensions['another_dimension'] == 'another_val'
+
+
+unscoped = ('ReportAPIIDs false\nReportAPINames false\nReportServiceIDs false\nReportServiceNames false\n'
+            'ReportRouteIDs false\nReportHTTPMethods false\n')
+
+
+@pytest.mark.parametrize('level, directives', [
+    ('service_name+http_method', unscoped + 'ReportServiceNames true\nReportHTTPMethods true\n'
+                                            'ReportStatusCodeGroups false'),
+    ('service_name', unscoped + 'ReportServiceNames true\nReportStatusCodeGroups false'),
+    ('instance', unscoped + 'ReportStatusCodeGroups false'),
+    ('status_code', unscoped)])
+def test_rollup_levels_match_coarser_groups(reporter, level, directives):
+    reporter.config = Config(ParsedConfig('RollupLevels "service_name+http_method" "service_name" "instance" '
+                                          '"status_code"'))
+    reporter.update_http_method_scope_groups()
+    counters = reporter.calculate_rollup_metrics(reporter.sum_http_method_scoped_groups())
+    compared = ('upstream_latency', 'response_count')
+    rolled_up = {}
+    for metric, metrics, _ in counters:
+        for m in metrics:
+            if metric in compared and m.dimensions['rollup'] == level:
+                dimensions = tuple(sorted([(d, v) for d, v in m.dimensions.items() if d != 'rollup']))
+                rolled_up[(metric, dimensions)] = m.value
+
+    coarse = Reporter()
+    coarse.kong_state = reporter.kong_state
+    coarse.config = Config(ParsedConfig(directives))
+    coarse.update_http_method_scope_groups()
+    expected = {}
+    for metric in compared:
+        if coarse.config.will_report_status_codes:
+            metrics = coarse.calculate_status_code_scope_metrics(metric)
+        else:
+            metrics = coarse.calculate_http_method_scope_metrics(metric)
+        for m in metrics:
+            key = (metric, tuple(sorted(m.dimensions.items())))
+            expected[key] = expected.get(key, 0) + m.value
+    assert rolled_up == expected
+
+
+def test_invalid_rollup_level():
+    with pytest.raises(TypeError):
+        Config(ParsedConfig('RollupLevels "service_name+upstream"'))
+
+
+def test_sampled_gauge_metrics(reporter):
+    reporter.config = Config(ParsedConfig('Metric "connections_active" true\nMetric "connections_handled" true\n'
+                                          'SampleInterval 1'))
+    active = reporter.kong_state.server_metrics['connections_active']
+    reporter.gauge_sampler.add(dict(connections_active=active + 10))
+    reporter.add_gauge_samples(reporter.kong_state)
+    metrics = reporter.calculate_sampled_gauge_metrics()
+    assert sorted(m.value for m in metrics) == sorted([active, active + 10, active + 5.0])
+    assert reporter.calculate_sampled_gauge_metrics() == []
+
+
+def test_group_plan_reuse(reporter):
+    reporter.config = plugin_config(report_http_method=True)
+    reporter.update_http_method_scope_groups()
+    groups = reporter.http_method_scoped_groups
+    reporter.update_http_method_scope_groups()
+    assert reporter.http_method_scoped_groups is groups
+    assert (reporter.group_plan_hits, reporter.group_plan_misses) == (1, 1)
+    reporter.config = plugin_config(report_http_method=False)
+    reporter.update_http_method_scope_groups()
+    assert reporter.http_method_scoped_groups is not groups
+    assert (reporter.group_plan_hits, reporter.group_plan_misses) == (1, 2)
+
+
+def test_metrics_share_dimensions(reporter):
+    reporter.config = plugin_config(report_http_method=True, report_status_code=True)
+    reporter.update_http_method_scope_groups()
+    status_metrics = {}
+    for metric in status_code_scoped_metrics:
+        for m in reporter.calculate_status_code_scope_metrics(metric):
+            status_metrics.setdefault(tuple(sorted(m.dimensions.items())), []).append(m.dimensions)
+    for dimensions in status_metrics.values():
+        assert all([d is dimensions[0] for d in dimensions])
+
+
+def test_plugin_import_defers_heavy_modules():
+    root = dirname(dirname(dirname(abspath(__file__))))
+    script = ("import sys\n"
+              "from collectdutil import fauxllectd, utils\n"
+              "sys.modules['collectd'] = fauxllectd\n"
+              "import kong_plugin\n"
+              "kong_plugin.register_reporter(utils.ParsedConfig('ReportHTTPMethods false\\nJSONBackend json'))\n"
+              "modules = ('requests', 'multiprocessing', 'cProfile', 'gzip', 'json', 'orjson', 'ujson', 'simplejson')\n"
+              "print(' '.join(m for m in modules if m in sys.modules))")
+    loaded = subprocess.check_output([sys.executable, '-c', script], cwd=root).decode('utf-8').split()
+    assert loaded == []
+
+
+def test_json_backend_selected_by_first_read():
+    reporter = Reporter()
+    reporter.config = Config(ParsedConfig('JSONBackend json'))
+    assert reporter.json_backend is None
+    reporter.new_kong_state()
+    assert reporter.json_backend == 'json'
@@ -0,0 +1,18 @@
+from kong.sampler import GaugeSampler
+
+
+def test_aggregates():
+    sampler = GaugeSampler()
+    for value in (10, 30, 20):
+        sampler.add(dict(connections_active=value, connections_waiting=1))
+    assert sampler.drain() == dict(connections_active=dict(min=10, max=30, mean=20.0, last=20),
+                                   connections_waiting=dict(min=1, max=1, mean=1.0, last=1))
+
+
+def test_drain_starts_new_window():
+    sampler = GaugeSampler()
+    sampler.add(dict(connections_active=10))
+    sampler.drain()
+    assert sampler.drain() == {}
+    sampler.add(dict(connections_active=5))
+    assert sampler.drain() == dict(connections_active=dict(min=5, max=5, mean=5.0, last=5))
@@ -0,0 +1,61 @@
+from __future__ import absolute_import
+from os.path import dirname
+
+from collectdutil.utils import ParsedConfig
+import pytest
+
+from kong.config import Config
+from kong.replay import ReplayReporter
+from kong.shards import partition
+import kong.reporter
+
+
+def test_partition_balances_members():
+    groups = [set(range(size)) for size in (40, 10, 10, 10, 10, 1, 1)]
+    assigned = partition(groups, 2)
+    assert sorted([i for indices in assigned for i in indices]) == list(range(len(groups)))
+    members = [sum([len(groups[i]) + 1 for i in indices]) for indices in assigned]
+    assert abs(members[0] - members[1]) <= 11
+    assert partition(groups[:1], 3) == [[0], [], []]
+
+
+def test_shards_report_all_series_once(monkeypatch):
+    registered = []
+    monkeypatch.setattr(kong.reporter.collectd, 'register_read', lambda f, **kw: registered.append((f, kw)),
+                        raising=False)
+    payload = open('{0}/status.json'.format(dirname(__file__)), 'rb').read()
+    unsharded = ReplayReporter(Config(ParsedConfig('ReportHTTPMethods true')), [payload])
+    unsharded.update_and_report()
+
+    reporter = ReplayReporter(payloads=[payload])
+    reporter.load_config_and_register_read(ParsedConfig('ReportHTTPMethods true\nReadShards 3\nName "kong"'))
+    assert [kw['name'] for _, kw in registered] == ['kong', 'kong.shard1', 'kong.shard2']
+    reporters = [f.__self__ for f, _ in registered]
+    series = []
+    for shard in reporters:
+        shard.update_and_report()  # A single fetch serves every shard's read
+        series.extend(shard.series)
+    assert sorted(series) == sorted(unsharded.series)
+    assert all([shard.http_method_scoped_groups for shard in reporters])
+    assert not [s for shard in reporters[1:] for s in shard.series if s[1].startswith('kong.connections')]
+    assert reporter.shared_fetch.fetches == 1
+
+
+def test_invalid_combinations():
+    with pytest.raises(TypeError):
+        Config(ParsedConfig('ReadShards 2\nRollupLevels "instance"'))
+
+
+def test_read_shards_float():
+    config = Config(ParsedConfig('ReadShards 3.0'))
+    assert config.read_shards == 3 and isinstance(config.read_shards, int)
+    with pytest.raises(TypeError):
+        Config(ParsedConfig('ReadShards 0'))
+
+
+def test_read_time_budget_rejected():
+    # A shard degrading on its own would form groups under a different Config fingerprint than the other shards
+    with pytest.raises(TypeError) as e:
+        Config(ParsedConfig('ReadShards 2\nReadTimeBudget 1'))
+    assert 'ReadTimeBudget' in str(e.value)
+    assert Config(ParsedConfig('ReadShards 1\nReadTimeBudget 1')).read_time_budget
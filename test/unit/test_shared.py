@@ -0,0 +1,63 @@
+from __future__ import absolute_import
+from os.path import dirname
+import json
+
+from collectdutil.utils import ParsedConfig
+
+from kong.config import Config
+from kong.kong_state import KongState
+from kong.reporter import Reporter
+from kong import shared
+
+
+class CountingKongStates(object):
+
+    def __init__(self, state_file='status.json'):
+        self.status = json.load(open('{0}/{1}'.format(dirname(__file__), state_file)))
+        self.created = 0
+
+    def __call__(self):
+        self.created += 1
+        kong_state = KongState(decoded_contexts={})
+        kong_state.get_sfx_view = lambda: self.status
+        return kong_state
+
+
+def test_reuse_within_window(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shared.time, 'time', lambda: now[0])
+    new_kong_state = CountingKongStates()
+    fetch = shared.SharedFetch(window=10)
+    first = fetch.kong_state(new_kong_state)
+    now[0] += 4
+    assert fetch.kong_state(new_kong_state) is first
+    now[0] += 1
+    assert fetch.kong_state(new_kong_state) is not first
+    assert (new_kong_state.created, fetch.fetches, fetch.reuses) == (2, 2, 1)
+
+
+def test_registry_narrows_window(monkeypatch):
+    monkeypatch.setattr(shared, 'shared_fetches', {})
+    fetch = shared.shared_fetch('key', 60)
+    assert shared.shared_fetch('key', 5) is fetch
+    assert shared.shared_fetch('key') is fetch
+    assert fetch.window == 5
+    assert shared.shared_fetch('other', None).window == shared.default_window
+
+
+def test_reporters_share_state(monkeypatch):
+    monkeypatch.setattr(shared, 'shared_fetches', {})
+    new_kong_state = CountingKongStates()
+    reporters = []
+    for config_string in ('ReportHTTPMethods true\nReportRouteIDs true', 'ReportHTTPMethods false\nInterval 60'):
+        reporter = Reporter()
+        reporter.config = Config(ParsedConfig(config_string + '\nShareFetch true'))
+        reporter.shared_fetch = shared.shared_fetch(reporter.fetch_key(), reporter.config.interval)
+        reporter.new_kong_state = new_kong_state
+        reporters.append(reporter)
+    assert reporters[0].shared_fetch is reporters[1].shared_fetch
+    for reporter in reporters:
+        reporter.update_and_report()
+    assert new_kong_state.created == 1
+    assert reporters[0].kong_state is reporters[1].kong_state
+    assert len(reporters[0].http_method_scoped_groups) > len(reporters[1].http_method_scoped_groups)
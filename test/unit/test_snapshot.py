@@ -0,0 +1,60 @@
+from __future__ import absolute_import
+
+from unit.conftest import plugin_config
+from kong.reporter import Reporter
+from kong.snapshot import Snapshot, load_snapshot, write_snapshot
+import kong.reporter
+
+
+def test_round_trip(tmpdir, kong_state):
+    path = str(tmpdir.join('kong.snapshot'))
+    contexts = list(kong_state.resource_metrics)
+    groups = [set(contexts[::2]), set(contexts[1::2])]
+    write_snapshot(path, 'a' * 32, contexts, groups)
+    snapshot = load_snapshot(path)
+    assert snapshot.fingerprint == 'a' * 32
+    assert len(snapshot) == len(contexts)
+    assert snapshot.plan_contexts() == frozenset(contexts)
+    assert snapshot.groups() == groups
+    snapshot.close()
+
+
+def test_unreadable_snapshots(tmpdir):
+    assert load_snapshot(str(tmpdir.join('missing'))) is None
+    empty = tmpdir.join('empty')
+    empty.write('')
+    assert load_snapshot(str(empty)) is None
+    other = tmpdir.join('other')
+    other.write('x' * 100)
+    assert load_snapshot(str(other)) is None
+
+
+def test_reporter_warm_start(tmpdir, kong_state, monkeypatch):
+    path = str(tmpdir.join('kong.snapshot'))
+    config = plugin_config(report_http_method=True)
+    config.snapshot_file = path
+    cold = Reporter()
+    cold.config, cold.kong_state, cold.decoded_contexts = config, kong_state, kong_state.decoded_contexts
+    cold.update_http_method_scope_groups()
+    cold.write_snapshot()
+
+    def grouper(*args):
+        raise AssertionError('Group plan not restored from snapshot')
+
+    monkeypatch.setattr(kong.reporter, 'Grouper', grouper)
+    warm = Reporter()
+    warm.config, warm.kong_state, warm.snapshot = config, kong_state, Snapshot(path)
+    warm.update_http_method_scope_groups()
+    assert warm.http_method_scoped_groups == cold.http_method_scoped_groups
+    assert warm.http_method_scoped_dimensions == cold.http_method_scoped_dimensions
+
+
+def test_changed_contexts_form_groups(tmpdir, kong_state):
+    path = str(tmpdir.join('kong.snapshot'))
+    config = plugin_config(report_http_method=True)
+    contexts = list(kong_state.resource_metrics)
+    write_snapshot(path, config.fingerprint(), contexts[1:], [set(contexts[1:])])
+    reporter = Reporter()
+    reporter.config, reporter.kong_state, reporter.snapshot = config, kong_state, Snapshot(path)
+    reporter.update_http_method_scope_groups()
+    assert set().union(*reporter.http_method_scoped_groups) == set(contexts)
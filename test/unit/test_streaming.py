@@ -0,0 +1,86 @@
+from __future__ import absolute_import
+from collections import defaultdict
+from os.path import dirname
+import json
+
+from collectdutil.utils import ParsedConfig
+import pytest
+
+from unit.conftest import plugin_config
+from kong.config import Config
+from kong.kong_state import KongState
+from kong.reporter import Reporter
+from kong.streaming import StreamingAggregator
+
+
+def streamed_kong_state(config, state_file='status.json'):
+    status = json.load(open('{0}/{1}'.format(dirname(__file__), state_file)))
+    streaming = StreamingAggregator()
+    streaming.start(config)
+    kong_state = KongState(decoded_contexts={}, streaming=streaming)
+    kong_state.get_sfx_view = lambda: status
+    kong_state.update_from_sfx()
+    return kong_state
+
+
+def summed_values(metrics):
+    '''Sums metric values by dimensions, as groups with the same reported dimensions are merged when streaming.'''
+    sums = defaultdict(int)
+    for metric in metrics:
+        sums[tuple(sorted(metric.dimensions.items()))] += metric.value
+    return dict(sums)
+
+
+@pytest.mark.parametrize('state_file', ['status.json', 'status_snapshot_1.json'])
+@pytest.mark.parametrize('config_kwargs', [dict(), dict(report_http_method=True),
+                                           dict(report_route_id=True, report_http_method=True,
+                                                report_status_code=True),
+                                           dict(report_http_method=True, report_status_code_group=True),
+                                           dict(report_api_name=True, report_http_method=True, http_blacklist=['GET'])])
+def test_streamed_metrics_match(kong_state_from_file, state_file, config_kwargs):
+    reporter = Reporter()
+    reporter.config = plugin_config(**config_kwargs)
+    reporter.kong_state = kong_state_from_file(state_file)
+    reporter.update_http_method_scope_groups()
+    expected = dict()
+    for metric in ('request_latency', 'response_count'):
+        expected[metric] = reporter.calculate_http_method_scope_metrics(metric)
+    expected['status'] = reporter.calculate_status_code_scope_metrics('response_size')
+
+    streamed = Reporter()
+    streamed.config = reporter.config
+    streamed.kong_state = streamed_kong_state(streamed.config, state_file)
+    streamed.streaming = streamed.kong_state.streaming
+    assert streamed.kong_state.resource_metrics == {}
+    assert streamed.kong_state.context_count == reporter.kong_state.context_count
+    group_sums = streamed.update_streamed_groups()
+    calculated = dict()
+    for metric in ('request_latency', 'response_count'):
+        calculated[metric] = streamed.calculate_http_method_scope_metrics(metric, group_sums)
+    calculated['status'] = streamed.calculate_status_code_scope_metrics('response_size', group_sums)
+
+    for key in expected:
+        assert summed_values(calculated[key]) == summed_values(expected[key])
+
+
+def test_dimension_key():
+    config = plugin_config(report_http_method=True, report_api_name=True, api_name_blacklist=['hidden'])
+    streaming = StreamingAggregator()
+    streaming.start(config)
+    context = dict(api_id=None, api_name=u'shown', service_id=None, service_name=None, route_id=None,
+                   http_method=u'GET')
+    assert streaming.dimension_key(context) == ((u'api_name', u'shown'), (u'http_method', u'GET'))
+    context['api_name'] = u'hidden'
+    assert streaming.dimension_key(context) == ((u'http_method', u'GET'),)
+    streaming.fold(context, '1,1,1,1,1,1,200:1:1:1:1')
+    streaming.fold(context, '1,1,1,1,1,1,200:1:1:1:1')
+    assert streaming.groups[((u'http_method', u'GET'),)][1]['200']['response_count'] == 2
+    streaming.start(config)
+    assert streaming.groups == {}
+    assert len(streaming.keys) == 2
+
+
+def test_streaming_excludes_other_aggregation():
+    for other in ('AggregationProcesses 2', 'ShareFetch true'):
+        with pytest.raises(TypeError):
+            Config(ParsedConfig('StreamingAggregation true\n{0}'.format(other)))
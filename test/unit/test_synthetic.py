@@ -0,0 +1,53 @@
+from __future__ import absolute_import
+
+import pytest
+
+from kong.kong_state import KongState
+from kong.synthetic import SyntheticStatus
+
+
+def kong_state_from_status(status):
+    kong_state = KongState()
+    kong_state.get_sfx_view = lambda: status
+    kong_state.update_from_sfx()
+    return kong_state
+
+
+@pytest.mark.parametrize('shape', (dict(apis=3, services=0), dict(services=5, routes_per_service=3),
+                                   dict(apis=2, services=2, http_methods=5, status_codes=10)))
+def test_context_count(shape):
+    synthetic = SyntheticStatus(**shape)
+    status = synthetic.snapshot()
+    assert len(status['signalfx']) == synthetic.contexts
+    kong_state = kong_state_from_status(status)
+    assert len(kong_state.resource_metrics) == synthetic.contexts
+    assert len(kong_state.http_methods) == shape.get('http_methods', 2)
+    assert len(kong_state.status_codes) == shape.get('status_codes', 4)
+
+
+def test_with_contexts():
+    assert SyntheticStatus.with_contexts(1000).contexts == 1004
+
+
+def test_status_code_integrity():
+    kong_state = kong_state_from_status(SyntheticStatus(apis=2, services=2, routes_per_service=2).snapshot())
+    for context in kong_state.resource_metrics.values():
+        status_codes = context['status_codes'].values()
+        assert context['response_count'] == sum(sc['response_count'] for sc in status_codes)
+        assert context['response_size'] == sum(sc['response_size'] for sc in status_codes)
+        assert context['request_latency'] == context['kong_latency'] + context['upstream_latency']
+
+
+def test_counters_grow():
+    synthetic = SyntheticStatus()
+    first, second = synthetic.snapshot(), synthetic.snapshot()
+    for context, metrics in first['signalfx'].items():
+        assert int(second['signalfx'][context].split(',')[0]) > int(metrics.split(',')[0])
+
+
+def test_churn():
+    synthetic = SyntheticStatus(apis=10, services=10, churn=.5, seed=1)
+    first, second = set(synthetic.snapshot()['signalfx']), set(synthetic.snapshot()['signalfx'])
+    assert len(first) == len(second)
+    assert len(first - second) == (5 + 5 * synthetic.routes_per_service) * len(synthetic.http_methods)
+    assert SyntheticStatus(seed=1).snapshot() == SyntheticStatus(seed=1).snapshot()
@@ -0,0 +1,51 @@
+from __future__ import absolute_import
+
+import pytest
+
+from kong import telemetry as telemetry_module
+from kong.telemetry import Telemetry
+
+
+@pytest.fixture()
+def dispatched(monkeypatch):
+    dispatched = []
+
+    class Values(object):
+
+        def __init__(self, **kwargs):
+            self.__dict__.update(kwargs)
+
+        def dispatch(self):
+            dispatched.append(self)
+
+    monkeypatch.setattr(telemetry_module.collectd, 'Values', Values)
+    return dispatched
+
+
+def test_emit(dispatched):
+    telemetry = Telemetry(host='somehost')
+    telemetry.record('contexts', 10)
+    telemetry.record_hit_ratio('decoded_contexts', 3, 1)
+    telemetry.record_hit_ratio('group_plan', 0, 0)
+    telemetry.emit()
+    values = dict((v.type_instance, v) for v in dispatched)
+    assert sorted(values) == ['kong.plugin.contexts', 'kong.plugin.decoded_contexts.hit_ratio',
+                              'kong.plugin.fetch_errors', 'kong.plugin.oversize_responses']
+    assert values['kong.plugin.contexts'].values == [10]
+    assert values['kong.plugin.decoded_contexts.hit_ratio'].values == [0.75]
+    assert values['kong.plugin.fetch_errors'].type == 'counter'
+    assert values['kong.plugin.oversize_responses'].type == 'counter'
+    for v in dispatched:
+        assert v.plugin == 'kong'
+        assert v.plugin_instance == 'telemetry'
+        assert v.host == 'somehost'
+
+
+def test_gauges_are_per_read(dispatched):
+    telemetry = Telemetry()
+    telemetry.record('contexts', 10)
+    telemetry.emit()
+    telemetry.fetch_errors += 1
+    telemetry.emit()
+    assert [(v.type_instance, v.values) for v in dispatched[3:]] == [('kong.plugin.fetch_errors', [1]),
+                                                                     ('kong.plugin.oversize_responses', [0])]
@@ -0,0 +1,26 @@
+from __future__ import absolute_import
+
+from collectdutil.utils import ParsedConfig
+
+from kong.config import Config
+from kong.fakekong import FakeKong, PayloadSource
+from kong.reporter import Reporter
+from kong.synthetic import SyntheticStatus
+
+
+def test_reporter_reads_over_socket(tmpdir):
+    synthetic = SyntheticStatus(services=10, routes_per_service=2)
+    kong = FakeKong(PayloadSource(synthetic))
+    url = kong.start(socket_path=str(tmpdir.join('kong.sock')))
+    try:
+        reporter = Reporter()
+        reporter.config = Config(ParsedConfig('URL "{0}"'.format(url)))
+        for _ in range(3):
+            kong_state = reporter.fetch_kong_state()
+            assert len(kong_state.resource_metrics) == synthetic.contexts
+        assert kong.requests == 3
+        adapter = reporter.session.get_adapter(reporter.config.request_url)
+        assert adapter.pool.num_connections == 1  # Reused by every read
+    finally:
+        kong.stop()
+    assert not tmpdir.join('kong.sock').exists()
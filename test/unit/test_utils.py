@@ -3,7 +3,7 @@ from fnmatch import translate
 
 import pytest
 
-from kong.utils import filter_by_pattern_lists, PatternList
+from kong.utils import filter_by_pattern_lists, intern_value, DimensionSets, PatternList
 
 
 def test_single_pattern():
@@ -44,6 +44,15 @@ def test_multiple_patterns_multiple_wildcards():
     assert pl.matches('two', 'one', '__two__', '__one__', 'three') == ['two', 'one', '__two__', '__one__']
 
 
+def test_pattern_matches():
+    pl = PatternList('*one*', '*two*')
+    pl.matches('one', '__one__', 'two', 'three', 'one', 'onetwo')
+    assert pl.pattern_matches == [3, 1]
+    pl.update('three')
+    pl.matches('three', 'one')
+    assert pl.pattern_matches == [4, 1, 1]
+
+
 def test_multiple_patterns_multiple_camel_wildcards():
     pl = PatternList('*one*two', '*two*three*four')
     assert pl.matches('__one____two') == ['__one____two']
@@ -85,3 +94,45 @@ def test_filter_by_pattern_lists(white, black, expected_hits, expected_misses):
     hits, misses = filter_by_pattern_lists([one, two, three, four], whitelist, blacklist)
     assert hits == expected_hits
     assert misses == expected_misses
+
+
+def test_match_cache():
+    pl = PatternList('*one*')
+    assert pl.matches('one', 'two') == ['one']
+    assert pl.match_cache == set(['one'])
+    assert pl.miss_cache == set(['two'])
+    assert (pl.cache_hits, pl.cache_misses) == (0, 2)
+    assert pl.matches('two', 'one', 'one') == ['one']
+    assert (pl.cache_hits, pl.cache_misses) == (3, 2)
+    pl.update('two')
+    assert pl.match_cache == set()
+    assert pl.matches('two', 'one') == ['two', 'one']
+
+
+def test_intern_value():
+    value = u''.join([u'ßƒß', u'-value'])
+    assert intern_value(value) is value
+    assert intern_value(u''.join([u'ßƒß', u'-value'])) is value
+
+
+def test_dimension_sets():
+    ds = DimensionSets()
+    dimensions = ds.get(dict(api_name='api', http_method='GET'))
+    assert ds.get(dict(api_name='api', http_method='GET')) is dimensions
+    status_dimensions = ds.updated(dimensions, 'status_code', '200')
+    assert status_dimensions == dict(api_name='api', http_method='GET', status_code='200')
+    assert ds.updated(dimensions, 'status_code', '200') is status_dimensions
+    assert ds.get(dict(api_name='api', http_method='GET', status_code='200')) is status_dimensions
+    assert ds.updated(status_dimensions, 'status_code', None) is dimensions
+    assert dimensions == dict(api_name='api', http_method='GET')
+
+
+def test_dimension_sets_rotate():
+    ds = DimensionSets()
+    dimensions = ds.get(dict(api_name='api'))
+    ds.rotate()
+    assert ds.get(dict(api_name='api')) is dimensions
+    ds.rotate()
+    ds.rotate()
+    assert ds.get(dict(api_name='api')) is not dimensions
+    assert not ds.previous_sets